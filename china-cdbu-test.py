@@ -1,13 +1,22 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory
 import subprocess
+import base64
 import os
 import re
-import sqlite3
 import json
 from datetime import datetime
 import sys
 import time
 import logging
+import threading
+import uuid
+import shutil
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import history_store
+from log_classifier import LogClassifier, MAX_LINE_CHARS
 
 # ==========================================
 # 1. LOGGING CONFIGURATION
@@ -35,6 +44,11 @@ def add_header(response):
     response.headers["Expires"] = "0"
     return response
 
+@app.teardown_appcontext
+def release_history_reader(exc):
+    # Each request runs on its own thread: hand the read connection back for the next one
+    history_store.release_reader()
+
 # ----------------------------
 # CONFIG
 # ----------------------------
@@ -46,8 +60,25 @@ else:
 PROJECT_ROOT = os.getcwd() 
 PLAYWRIGHT_CLI = os.path.join(PROJECT_ROOT, "node_modules", "@playwright", "test", "cli.js")
 TEST_RESULTS_DIR = os.path.join(PROJECT_ROOT, "test-results")
+LOGS_DIR = os.path.join(PROJECT_ROOT, "logs")
 DB_PATH = os.path.join(PROJECT_ROOT, "test_history.db")
 
+# Shared SSH tunnel manager lives next to the DB scripts in tests/
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "tests"))
+import tunnel_manager
+from tunnel_manager import TunnelError
+from env_config import ENV_MAP as TEST_ENV_MAP
+
+# Open the DB tunnel once per run and share it with specs and scripts
+USE_SHARED_DB_TUNNEL = os.getenv("USE_SHARED_DB_TUNNEL", "1") == "1"
+
+# Log in once per environment and hand the saved session (Playwright storage
+# state) to every spec and script via STORAGE_STATE
+USE_STORAGE_STATE = os.getenv("USE_STORAGE_STATE", "1") == "1"
+AUTH_DIR = os.path.join(PROJECT_ROOT, ".auth")
+STORAGE_STATE_TTL_MINUTES = int(os.getenv("STORAGE_STATE_TTL_MINUTES", 30))
+LOGIN_SCRIPT = os.path.join(PROJECT_ROOT, "scripts", "save-storage-state.js")
+
 ENV_URLS = {
     "cdbu_dev": "https://dev-spriced-cdbu.alpha.simadvisory.com/",
     "cdbu_qa": "https://qa-spriced-cdbu.alpha.simadvisory.com/",
@@ -67,9 +98,55 @@ CHINA_TEST_FILES = [
     # "Reports.spec.js"
 ]
 
+# Browsers run headless; headed only when a project below or the request (?headed=1)
+# asks for it. PLAYWRIGHT_HEADED=1 flips the default for local debugging.
+DEFAULT_HEADED = os.getenv("PLAYWRIGHT_HEADED", "0") == "1"
+PROJECT_HEADED = {
+    # "China Project": True,
+}
+
+# Marker printed by utils/waits.js fixedSleep(), totalled per spec so deliberate
+# fixed waits stay visible in the logs
+FIXED_SLEEP_PATTERN = re.compile(r"FIXED-SLEEP (\d+)ms")
+# Phase marker printed by utils/timing.js and tests/timing.py: "⏱️ PHASE [login] 1234ms"
+PHASE_PATTERN = re.compile(r"PHASE \[(.+?)\] (\d+)ms")
+# Final summary lines of Playwright's line reporter: "  3 passed (12.4s)", "  1 failed", ...
+REPORTER_COUNT_PATTERN = re.compile(r"^\s*(\d+) (passed|failed|flaky|skipped|interrupted|did not run)\b")
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+# Specs also write a JSON report (next to their log) for per-test results;
+# its stats map onto the same counts as the line reporter summary
+JSON_REPORT_STATS = {"expected": "passed", "unexpected": "failed", "flaky": "flaky", "skipped": "skipped"}
+MAX_CASE_ERROR_CHARS = 2000
+
+# Child output goes straight to its log file; only the last lines are kept in
+# memory for the result / API response
+OUTPUT_TAIL_LINES = int(os.getenv("OUTPUT_TAIL_LINES", 200))
+OUTPUT_TAIL_LINE_CHARS = 1000
+
+# Number of spec files executed concurrently (override per request with ?workers=N)
+PLAYWRIGHT_WORKERS = int(os.getenv("PLAYWRIGHT_WORKERS", os.cpu_count() or 1))
+# Parallel runs start the longest specs first, using the average duration over
+# this many recent executions (file size stands in for specs with no history)
+SCHEDULE_HISTORY_RUNS = int(os.getenv("SCHEDULE_HISTORY_RUNS", 10))
+
 NRP_TEST_FILES = []
 PSBU_TEST_FILES = []
 
+# Number of suite runs (jobs) allowed to execute at the same time
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+# Finished jobs kept in memory for the status API
+MAX_FINISHED_JOBS = 50
+# Output lines kept per job for live streaming / late subscribers; once a job
+# finishes only its last OUTPUT_TAIL_LINES stay in memory
+JOB_STREAM_BUFFER_LINES = int(os.getenv("JOB_STREAM_BUFFER_LINES", 5000))
+
+# History retention, per project: runs beyond the newest HISTORY_KEEP_RUNS or older
+# than HISTORY_KEEP_DAYS are pruned in the background (0 disables a limit)
+HISTORY_KEEP_RUNS = int(os.getenv("HISTORY_KEEP_RUNS", 500))
+HISTORY_KEEP_DAYS = int(os.getenv("HISTORY_KEEP_DAYS", 180))
+# Executions deleted per transaction, so pruning never holds the write lock for long
+HISTORY_PRUNE_BATCH = int(os.getenv("HISTORY_PRUNE_BATCH", 200))
+
 # Python Post-Execution Scripts
 PYTHON_POST_EXECUTION_SCRIPTS = [
     # "tests/alerts.py",
@@ -81,28 +158,12 @@ PYTHON_POST_EXECUTION_SCRIPTS = [
 # ----------------------------
 # DATABASE FUNCTIONS
 # ----------------------------
+# Schema, migrations and the single writer live in history_store.py
 def init_db():
-    """Initialize the database with required tables"""
+    """Initialize the database with required tables, migrating older schemas"""
     logger.info(f"🛠️  Initializing database at: {DB_PATH}")
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS test_executions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                project_name TEXT NOT NULL,
-                execution_date DATE NOT NULL,
-                execution_time TIME NOT NULL,
-                platform TEXT NOT NULL,
-                total_tests INTEGER NOT NULL,
-                passed_tests INTEGER NOT NULL,
-                failed_tests INTEGER NOT NULL,
-                failed_tests_json TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        history_store.init(DB_PATH)
         logger.info("✅ Database initialized successfully.")
         return True
     except Exception as e:
@@ -113,93 +174,316 @@ def clear_db():
     """Clears all previous test execution history."""
     logger.info("🗑️  Clearing previous test history from database...")
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=10)
-        c = conn.cursor()
-        c.execute('DELETE FROM test_executions')
-        c.execute('DELETE FROM sqlite_sequence WHERE name="test_executions"')
-        conn.commit()
-        c.execute('VACUUM')
-        conn.commit()
-        conn.close()
+        history_store.clear()
         logger.info("✅ Database cleared successfully.")
         return True
     except Exception as e:
         logger.error(f"❌ Error clearing database: {e}")
         return False
 
-def save_execution_to_db(project_name, total_tests, passed_tests, failed_tests, failed_tests_list, platform='UAT'):
-    """Save test execution results to database"""
+def prune_history(keep_runs=HISTORY_KEEP_RUNS, keep_days=HISTORY_KEEP_DAYS, batch=HISTORY_PRUNE_BATCH):
+    """Deletes executions outside the retention window in small batches; returns how many."""
+    try:
+        pruned = history_store.prune(keep_runs, keep_days, batch)
+        if pruned:
+            logger.info(f"🧹 Pruned {pruned} executions outside retention ({keep_runs} runs / {keep_days} days per project)")
+        return pruned
+    except Exception as e:
+        logger.error(f"❌ Error pruning history: {e}")
+        return 0
+
+# One background pruner; a request while one is queued is dropped
+history_pruner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prune")
+# Held from scheduling until the prune starts; a non-blocking acquire is the test-and-set
+PRUNE_PENDING = threading.Lock()
+
+def schedule_history_prune():
+    if not PRUNE_PENDING.acquire(blocking=False):
+        return
+
+    def run():
+        PRUNE_PENDING.release()
+        prune_history()
+
+    try:
+        history_pruner.submit(run)
+    except RuntimeError:
+        PRUNE_PENDING.release()
+        raise
+
+def save_execution_to_db(project_name, tests, timings=None, platform='UAT'):
+    """Save an execution with its per-file results, test cases and timings in one transaction"""
     logger.info(f"💾 Saving execution results for {project_name} ({platform})...")
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=10)
-        c = conn.cursor()
-        
-        now = datetime.now()
-        execution_date = now.strftime('%Y-%m-%d')
-        execution_time = now.strftime('%H:%M:%S')
-        
-        c.execute('''
-            INSERT INTO test_executions 
-            (project_name, execution_date, execution_time, platform, 
-             total_tests, passed_tests, failed_tests, failed_tests_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (project_name, execution_date, execution_time, platform,
-              total_tests, passed_tests, failed_tests, 
-              json.dumps(failed_tests_list)))
-        
-        execution_id = c.lastrowid
-        conn.commit()
-        conn.close()
-        
-        logger.info(f"✅ Results saved! [ID: {execution_id}] - Passed: {passed_tests}/{total_tests}")
+        execution_id = history_store.save_execution(project_name, tests, timings, platform)
+        passed_tests = len([t for t in tests if t['status'] == 'PASS'])
+        logger.info(f"✅ Results saved! [ID: {execution_id}] - Passed: {passed_tests}/{len(tests)}")
         return execution_id
     except Exception as e:
         logger.error(f"❌ Error saving to database: {e}")
         return None
 
+def timing_row_to_dict(row):
+    return {
+        'file': row[0],
+        'kind': row[1],
+        'status': row[2],
+        'exitCode': row[3],
+        'startedAt': row[4],
+        'finishedAt': row[5],
+        'durationMs': row[6],
+        'phases': json.loads(row[7]) if row[7] else []
+    }
+
+# ----------------------------
+# API: TIMINGS
+# ----------------------------
+@app.route('/api/executions/<int:execution_id>/timings')
+def get_execution_timings(execution_id):
+    """Per spec/script timing of one execution, slowest first."""
+    logger.info(f"📥 API Request: /api/executions/{execution_id}/timings")
+    try:
+        conn = history_store.reader()
+        rows = conn.execute('''
+            SELECT file, kind, status, exit_code, started_at, finished_at, duration_ms, phases_json
+            FROM test_timings
+            WHERE execution_id = ?
+            ORDER BY duration_ms DESC
+        ''', (execution_id,)).fetchall()
+        return jsonify({'executionId': execution_id, 'timings': [timing_row_to_dict(r) for r in rows], 'success': True})
+    except Exception as e:
+        logger.error(f"❌ Error fetching timings: {e}")
+        return jsonify({'timings': [], 'success': False, 'error': str(e)})
+
+@app.route('/api/timings/summary')
+def get_timings_summary():
+    """Average / max / last duration per spec or script over the last ?runs= executions."""
+    runs = request.args.get('runs', default=20, type=int)
+    logger.info(f"📥 API Request: /api/timings/summary (runs={runs})")
+    try:
+        conn = history_store.reader()
+        rows = conn.execute('''
+            SELECT file, kind, COUNT(*), AVG(duration_ms), MAX(duration_ms),
+                   (SELECT t2.duration_ms FROM test_timings t2
+                     WHERE t2.file = t.file ORDER BY t2.id DESC LIMIT 1)
+            FROM test_timings t
+            WHERE execution_id IN (SELECT id FROM test_executions ORDER BY id DESC LIMIT ?)
+            GROUP BY file, kind
+            ORDER BY AVG(duration_ms) DESC
+        ''', (runs,)).fetchall()
+        summary = [{
+            'file': r[0],
+            'kind': r[1],
+            'runs': r[2],
+            'avgMs': round(r[3] or 0),
+            'maxMs': r[4],
+            'lastMs': r[5]
+        } for r in rows]
+        return jsonify({'summary': summary, 'success': True})
+    except Exception as e:
+        logger.error(f"❌ Error fetching timing summary: {e}")
+        return jsonify({'summary': [], 'success': False, 'error': str(e)})
+
+# ----------------------------
+# API: TEST CASES
+# ----------------------------
+def case_row_to_dict(row):
+    return {
+        'file': row[0],
+        'title': row[1],
+        'project': row[2],
+        'status': row[3],
+        'outcome': row[4],
+        'durationMs': row[5],
+        'retries': row[6],
+        'error': row[7],
+        'errorLocation': row[8]
+    }
+
+@app.route('/api/executions/<int:execution_id>/cases')
+def get_execution_cases(execution_id):
+    """Per-test results of one execution (?file= spec, ?status= e.g. failed), in report order."""
+    logger.info(f"📥 API Request: /api/executions/{execution_id}/cases {dict(request.args)}")
+    try:
+        query = '''
+            SELECT file, title, project, status, outcome, duration_ms, retries, error, error_location
+            FROM test_cases
+            WHERE execution_id = ?
+        '''
+        params = [execution_id]
+        for column in ('file', 'status'):
+            if request.args.get(column):
+                query += f' AND {column} = ?'
+                params.append(request.args[column])
+        rows = history_store.reader().execute(query + ' ORDER BY id', params).fetchall()
+        return jsonify({'executionId': execution_id, 'cases': [case_row_to_dict(r) for r in rows], 'success': True})
+    except Exception as e:
+        logger.error(f"❌ Error fetching test cases: {e}")
+        return jsonify({'cases': [], 'success': False, 'error': str(e)})
+
+@app.route('/api/tests/flaky')
+def get_flaky_tests():
+    """Tests that were flaky, or both passed and failed, over the last ?runs= executions."""
+    runs = request.args.get('runs', default=20, type=int)
+    logger.info(f"📥 API Request: /api/tests/flaky (runs={runs})")
+    try:
+        rows = history_store.reader().execute('''
+            SELECT file, title, COUNT(*),
+                   SUM(outcome = 'flaky'), SUM(outcome = 'unexpected'), AVG(duration_ms), SUM(retries)
+            FROM test_cases
+            WHERE execution_id IN (SELECT id FROM test_executions ORDER BY id DESC LIMIT ?)
+            GROUP BY file, title
+            HAVING SUM(outcome = 'flaky') > 0
+                OR (SUM(outcome = 'unexpected') > 0 AND SUM(outcome = 'expected') > 0)
+            ORDER BY SUM(outcome = 'flaky') + SUM(outcome = 'unexpected') DESC
+        ''', (runs,)).fetchall()
+        tests = [{
+            'file': r[0],
+            'title': r[1],
+            'runs': r[2],
+            'flaky': r[3],
+            'failed': r[4],
+            'avgMs': round(r[5] or 0),
+            'retries': r[6]
+        } for r in rows]
+        return jsonify({'tests': tests, 'success': True})
+    except Exception as e:
+        logger.error(f"❌ Error fetching flaky tests: {e}")
+        return jsonify({'tests': [], 'success': False, 'error': str(e)})
+
 # ----------------------------
 # API: GET HISTORY
 # ----------------------------
+HISTORY_PAGE_SIZE = 100
+HISTORY_MAX_PAGE_SIZE = 500
+
+def encode_history_cursor(created_at, execution_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, execution_id]).encode()).decode()
+
+def decode_history_cursor(cursor):
+    created_at, execution_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return str(created_at), int(execution_id)
+
+def parse_history_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+def fetch_results_by_execution(c, ids, failed_only=False):
+    """Per-file results for a set of executions in one indexed lookup.
+
+    failed_only keeps every result that did not pass (FAIL, NOT_FOUND, ...),
+    the same ones counted in an execution's failed_tests.
+    """
+    by_execution = {}
+    if not ids:
+        return by_execution
+    query = f'''
+        SELECT execution_id, file, status, log_file, exit_code, summary_json
+        FROM test_results
+        WHERE execution_id IN ({",".join("?" for _ in ids)})
+    '''
+    params = list(ids)
+    if failed_only:
+        query += " AND status != 'PASS'"
+    for execution_id, file, file_status, log_file, exit_code, summary_json in c.execute(query + ' ORDER BY id', params):
+        entry = {'file': file, 'status': file_status, 'logFile': log_file, 'exitCode': exit_code}
+        # Reporter counts / failure matches (results saved before these were captured have none)
+        entry.update(json.loads(summary_json) if summary_json else {})
+        by_execution.setdefault(execution_id, []).append(entry)
+    return by_execution
+
 @app.route('/api/get-history')
 def get_history():
-    logger.info("📥 API Request: /api/get-history")
+    """
+    Newest executions first, one page at a time (keyset pagination on created_at/id).
+
+    Query params: limit, cursor (nextCursor of the previous page), project, platform,
+    from / to (YYYY-MM-DD, inclusive, on the local execution date like /api/stats) and details=0 to leave out
+    failedTests (fetch them per execution from /api/executions/<id>/results).
+    """
+    logger.info(f"📥 API Request: /api/get-history {dict(request.args)}")
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=10)
+        limit = min(max(request.args.get('limit', default=HISTORY_PAGE_SIZE, type=int), 1), HISTORY_MAX_PAGE_SIZE)
+        details = parse_flag(request.args['details']) if 'details' in request.args else True
+        where, params = [], []
+        if request.args.get('project'):
+            where.append('project_name = ?')
+            params.append(request.args['project'])
+        if request.args.get('platform'):
+            where.append('platform = ?')
+            params.append(request.args['platform'])
+        if request.args.get('from'):
+            where.append('execution_date >= ?')
+            params.append(parse_history_date(request.args['from']))
+        if request.args.get('to'):
+            where.append('execution_date <= ?')
+            params.append(parse_history_date(request.args['to']))
+        if request.args.get('cursor'):
+            where.append('(created_at, id) < (?, ?)')
+            params.extend(decode_history_cursor(request.args['cursor']))
+    except (ValueError, TypeError) as e:
+        return jsonify({'history': [], 'success': False, 'error': f'Invalid query parameter: {e}'}), 400
+
+    try:
+        conn = history_store.reader()
         c = conn.cursor()
         
-        c.execute('''
+        # One extra row tells whether another page exists
+        c.execute(f'''
             SELECT id, project_name, execution_date, execution_time, platform,
-                   total_tests, passed_tests, failed_tests, failed_tests_json
+                   total_tests, passed_tests, failed_tests, created_at
             FROM test_executions
-            ORDER BY created_at DESC
-            LIMIT 100
-        ''')
-        
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (*params, limit + 1))
         rows = c.fetchall()
-        conn.close()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        failed_by_execution = fetch_results_by_execution(c, [row[0] for row in rows], failed_only=True) if details else {}
         
         history = []
         for row in rows:
             time_str = row[3][:5] if len(row[3]) > 5 else row[3]
-            history.append({
+            entry = {
                 'id': f'proj_{row[0]}',
+                'executionId': row[0],
                 'name': row[1],
                 'date': row[2],
                 'time': time_str,
                 'platform': row[4],
                 'totalTests': row[5],
                 'passed': row[6],
-                'failed': row[7],
-                'failedTests': json.loads(row[8]) if row[8] else []
-            })
+                'failed': row[7]
+            }
+            if details:
+                entry['failedTests'] = [
+                    {'file': t['file'], 'status': t['status'], 'logFile': t['logFile'], 'error': t.get('error')}
+                    for t in failed_by_execution.get(row[0], [])
+                ]
+            history.append(entry)
+
+        next_cursor = encode_history_cursor(rows[-1][8], rows[-1][0]) if has_more else None
         
         logger.info(f"📊 Returned {len(history)} history records.")
-        return jsonify({'history': history, 'success': True})
+        return jsonify({'history': history, 'nextCursor': next_cursor, 'success': True})
         
     except Exception as e:
         logger.error(f"❌ Error fetching history: {e}")
         return jsonify({'history': [], 'success': False, 'error': str(e)})
 
+@app.route('/api/executions/<int:execution_id>/results')
+def get_execution_results(execution_id):
+    """Per spec/script results of one execution (the details left out of a lightweight history page)."""
+    logger.info(f"📥 API Request: /api/executions/{execution_id}/results")
+    try:
+        c = history_store.reader().cursor()
+        results = fetch_results_by_execution(c, [execution_id]).get(execution_id, [])
+        return jsonify({'executionId': execution_id, 'results': results, 'success': True})
+    except Exception as e:
+        logger.error(f"❌ Error fetching results: {e}")
+        return jsonify({'results': [], 'success': False, 'error': str(e)})
+
 
 # ----------------------------
 # ROUTES: SERVE STATIC FILES
@@ -209,9 +493,9 @@ def home():
     logger.info("🌐 Serving Home Page")
     return render_template("index.html")
 
-@app.route("/logs/<project>/<filename>")
-def serve_log(project, filename):
-    return send_from_directory(os.path.join(PROJECT_ROOT, "logs", project), filename)
+@app.route("/logs/<path:filename>")
+def serve_log(filename):
+    return send_from_directory(LOGS_DIR, filename)
 
 @app.route("/test-results/<path:filename>")
 def serve_test_results(filename):
@@ -219,51 +503,357 @@ def serve_test_results(filename):
 
 
 # ----------------------------
-# CORE: RUN PLAYWRIGHT TESTS (JS)
+# LOG PATH HELPERS
 # ----------------------------
+def get_log_dir(project_name, env_key=None):
+    """Logs live under logs/<project>/<env> so environments can run side by side."""
+    if env_key:
+        return os.path.join(LOGS_DIR, project_name, env_key)
+    return os.path.join(LOGS_DIR, project_name)
 
-def run_test_group(test_files, project_name, target_env_url):
-    if not test_files:
-        logger.warning("🚫 No test files configured. Skipping Playwright execution.")
-        return []
+def get_results_dir(project_name, env_key, run_id):
+    """Playwright output (traces, screenshots) under test-results/<project>/<env>/<run>,
+    so runs never share a directory Playwright wipes at start-up."""
+    return os.path.join(TEST_RESULTS_DIR, project_name, env_key, run_id)
 
-    logger.info(f"🚀 Starting Playwright Test Group: {project_name}")
-    logger.info(f"🎯 Target Environment: {target_env_url}")
-    logger.critical(f"TEST FILES RECEIVED: {test_files}")
+def is_below(path, root):
+    """True if path resolves (symlinks included) to somewhere strictly inside root."""
+    path, root = os.path.realpath(path), os.path.realpath(root)
+    return path != root and os.path.commonpath([path, root]) == root
 
-    results = []
-    full_log = ""
+def get_log_url(log_dir, filename):
+    rel_path = os.path.relpath(os.path.join(log_dir, filename), PROJECT_ROOT)
+    return "/" + rel_path.replace(os.sep, "/")
 
-    log_dir = os.path.join(PROJECT_ROOT, "logs", project_name)
-    os.makedirs(log_dir, exist_ok=True)
+def get_test_env_name(target_env_url):
+    return "QA" if "qa" in target_env_url.lower() else "DEV"
 
-    # Prepare environment variables
-    env_vars = os.environ.copy()
-    env_vars["BASE_URL"] = target_env_url
-    env_vars["TEST_ENV_NAME"] = "QA" if "qa" in target_env_url.lower() else "DEV"
 
-    logger.info(f"⚙️ ENV Configured: TEST_ENV_NAME={env_vars['TEST_ENV_NAME']}")
+# ----------------------------
+# TIMING
+# ----------------------------
+def now_iso():
+    return datetime.now().isoformat(timespec="milliseconds")
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000)
+
+def parse_phases(text):
+    """Phases a child reported via PHASE markers, in output order."""
+    return [{"name": name, "ms": int(ms)} for name, ms in PHASE_PATTERN.findall(text)]
+
+def make_timing(file, kind, status, exit_code, started_at, started, phases):
+    return {
+        "file": file,
+        "kind": kind,
+        "status": status,
+        "exitCode": exit_code,
+        "startedAt": started_at,
+        "finishedAt": now_iso(),
+        "durationMs": elapsed_ms(started),
+        "phases": phases
+    }
+
+# ----------------------------
+# RESULT CLASSIFICATION
+# ----------------------------
+# Specs and scripts are classified from their output while it is captured; the
+# status decided here is the one saved to history (the logs are not re-read).
+# To re-check logs afterwards: python log_classifier.py logs/<project>/*.log
+def parse_reporter_counts(line, counts):
+    """Adds a Playwright summary line ("2 passed (8.1s)") to counts."""
+    match = REPORTER_COUNT_PATTERN.match(ANSI_PATTERN.sub("", line))
+    if match:
+        key = "didNotRun" if match.group(2) == "did not run" else match.group(2)
+        counts[key] = int(match.group(1))
+
+def output_lines(process):
+    """A child's output line by line; over-long lines come in MAX_LINE_CHARS pieces."""
+    return iter(lambda: process.stdout.readline(MAX_LINE_CHARS), "")
+
+def iter_report_specs(suite, titles=()):
+    """(describe titles, spec) for every spec of a JSON report suite, nested describes included."""
+    for spec in suite.get("specs", []):
+        yield titles, spec
+    for child in suite.get("suites", []):
+        yield from iter_report_specs(child, titles + (child.get("title", ""),))
+
+def report_case(titles, spec, test):
+    """One Playwright test of a JSON report as a history row."""
+    results = test.get("results") or [{}]
+    last = results[-1]
+    # The last attempt that failed explains a failure (or the flake, if a retry passed)
+    failing = next((r for r in reversed(results) if r.get("errors")), None)
+    error = failing["errors"][0] if failing else {}
+    location = error.get("location") or {}
+    return {
+        "title": " › ".join([*titles, spec.get("title", "")]),
+        "project": test.get("projectName"),
+        "status": last.get("status", "skipped"),
+        "outcome": test.get("status"),
+        "durationMs": sum(r.get("duration", 0) for r in results),
+        "retries": last.get("retry", 0),
+        "error": ANSI_PATTERN.sub("", error.get("message", ""))[:MAX_CASE_ERROR_CHARS] or None,
+        "errorLocation": f"{os.path.basename(location['file'])}:{location.get('line')}" if location.get("file") else None
+    }
+
+def read_json_report(path):
+    """Counts and per-test cases from a Playwright JSON report, or None when there is no usable report."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ No usable JSON report {os.path.basename(path)}: {e}")
+        return None
+    stats = report.get("stats") or {}
+    return {
+        "counts": {name: stats[key] for key, name in JSON_REPORT_STATS.items() if stats.get(key)},
+        # Top-level suites are the spec files, their titles are left out of test titles
+        "cases": [report_case(titles, spec, test)
+                  for suite in report.get("suites", [])
+                  for titles, spec in iter_report_specs(suite)
+                  for test in spec.get("tests", [])]
+    }
+
+def spec_status(exit_code, counts, classifier):
+    """PASS only for a clean exit with passing tests, no failed ones and no failure signatures."""
+    if exit_code != 0 or counts.get("failed") or counts.get("interrupted"):
+        return "FAIL"
+    if not (counts.get("passed") or counts.get("flaky")):
+        return "FAIL"
+    return classifier.status
+
+def script_status(exit_code, classifier):
+    return "FAIL" if exit_code != 0 else classifier.status
+
+def test_entry(result):
+    """The per-file record kept in history for a spec or script result."""
+    return {
+        "file": result["file"],
+        "status": result["status"],
+        "exitCode": result["exitCode"],
+        "logFile": result["logFile"],
+        "reporter": result.get("reporter"),
+        # Where the output failed (first few matches, with line numbers)
+        "failureMatches": result["failureMatches"][:5],
+        "cases": result.get("cases", []),
+        # Why a file has no output of its own (not found, runner error)
+        "error": result.get("error"),
+        # Not saved to history, the full output is in the log file
+        "outputTail": result.get("outputTail", "")
+    }
+
+def error_result(file, kind, status, error, started_at, started, log_url=None):
+    """The result for a spec or script that did not run to completion, so it still gets a row."""
+    return {
+        "file": file,
+        "status": status,
+        "exitCode": None,
+        "error": error,
+        "reporter": {},
+        "failureMatches": [],
+        "cases": [],
+        "outputTail": "",
+        "fixedSleepMs": 0,
+        "timing": make_timing(file, kind, status, None, started_at, started, []),
+        "logFile": log_url
+    }
+
+@contextmanager
+def timed_phase(phases, name):
+    """Times a runner-side step and appends it to phases."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append({"name": name, "ms": elapsed_ms(started)})
 
-    for test_file in test_files:
-        logger.info(f"🔄 Executing Test File: {test_file}")
 
-        test_path = os.path.join(PROJECT_ROOT, "tests", test_file)
-        if not os.path.isfile(test_path):
-            logger.error(f"❌ Test file NOT FOUND: {test_path}")
-            continue
+# ----------------------------
+# SHARED DB TUNNEL
+# ----------------------------
+def acquire_db_tunnel(test_env_name):
+    """Opens (or joins) the shared DB tunnel for an environment; returns the port or None."""
+    if not USE_SHARED_DB_TUNNEL:
+        return None
+    try:
+        port = tunnel_manager.acquire(test_env_name)
+        logger.info(f"🔗 Shared DB tunnel for {test_env_name} ready on port {port}")
+        return port
+    except TunnelError as e:
+        logger.warning(f"⚠️ Shared DB tunnel unavailable, scripts will open their own: {e}")
+        return None
+
+
+# ----------------------------
+# LOGIN ONCE (STORAGE STATE)
+# ----------------------------
+AUTH_LOCKS = {}
+AUTH_LOCKS_GUARD = threading.Lock()
+
+def storage_state_is_fresh(path):
+    try:
+        return time.time() - os.path.getmtime(path) < STORAGE_STATE_TTL_MINUTES * 60
+    except OSError:
+        return False
 
-        cmd = [
-            NODE_PATH,
-            PLAYWRIGHT_CLI,
-            "test",
-            test_path,
-            "--headed",
-            "--reporter=line"
-        ]
+def ensure_storage_state(env_key, target_env_url, test_env_name, job=None):
+    """Logs in once for env_key and returns the saved storage state path, or None."""
+    if not USE_STORAGE_STATE:
+        return None
 
+    path = os.path.join(AUTH_DIR, f"{env_key}.json")
+    with AUTH_LOCKS_GUARD:
+        lock = AUTH_LOCKS.setdefault(env_key, threading.Lock())
+
+    # Jobs starting together for the same environment wait for a single login
+    with lock:
+        if storage_state_is_fresh(path):
+            logger.info(f"🔓 Reusing saved login for {env_key}")
+            return path
+
+        auth_config = TEST_ENV_MAP.get(test_env_name, TEST_ENV_MAP["DEV"])
+        env_vars = os.environ.copy()
+        env_vars.update({
+            "STORAGE_STATE": path,
+            "STORAGE_STATE_TTL_MINUTES": str(STORAGE_STATE_TTL_MINUTES),
+            "FORCE_LOGIN": "1",
+            "UI_URL": target_env_url,
+            "AUTH_BASE_URL": auth_config["AUTH_BASE_URL"],
+            "AUTH_REALM": auth_config["AUTH_REALM"],
+            "AUTH_CLIENT_ID": auth_config["AUTH_CLIENT_ID"]
+        })
+
+        logger.info(f"🔐 Logging in once for {env_key}...")
         try:
-            logger.critical(f"PLAYWRIGHT CMD: {' '.join(cmd)}")
+            proc = subprocess.run(
+                [NODE_PATH, LOGIN_SCRIPT],
+                cwd=PROJECT_ROOT,
+                env=env_vars,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                timeout=120
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"⚠️ Login-once stage failed, specs will log in themselves: {e}")
+            return None
+
+        for line in (proc.stdout + proc.stderr).splitlines():
+            logger.info(f"[login] {line}")
+            publish_job_output(job, "login", line)
+
+        if proc.returncode != 0 or not os.path.isfile(path):
+            logger.warning(f"⚠️ Login-once stage failed (exit {proc.returncode}), specs will log in themselves.")
+            return None
+        return path
+
+
+# ----------------------------
+# SCHEDULING
+# ----------------------------
+def get_average_durations(files, runs=SCHEDULE_HISTORY_RUNS):
+    """Average spec duration (ms) over the last `runs` executions, for files that have history."""
+    if not files:
+        return {}
+    try:
+        conn = history_store.reader()
+        placeholders = ",".join("?" for _ in files)
+        rows = conn.execute(f'''
+            SELECT file, AVG(duration_ms)
+            FROM test_timings
+            WHERE kind = 'spec' AND status != 'NOT_FOUND'
+              AND file IN ({placeholders})
+              AND execution_id IN (SELECT id FROM test_executions ORDER BY id DESC LIMIT ?)
+            GROUP BY file
+        ''', (*files, runs)).fetchall()
+        return {file: avg for file, avg in rows if avg}
+    except Exception as e:
+        logger.warning(f"⚠️ Could not read spec durations, using file sizes: {e}")
+        return {}
+
+def schedule_longest_first(test_files):
+    """Orders specs longest-first so the slowest ones do not start last on the worker pool."""
+    durations = get_average_durations(test_files)
+    sizes = {}
+    for f in test_files:
+        try:
+            sizes[f] = os.path.getsize(os.path.join(PROJECT_ROOT, "tests", f))
+        except OSError:
+            sizes[f] = 0
 
+    # Unknown specs: scale file size by the ms-per-byte of the specs we have history for
+    rates = [durations[f] / sizes[f] for f in durations if sizes.get(f)]
+    ms_per_byte = sorted(rates)[len(rates) // 2] if rates else 1
+
+    estimates = {f: durations.get(f, sizes[f] * ms_per_byte) for f in test_files}
+    ordered = sorted(test_files, key=lambda f: estimates[f], reverse=True)
+
+    logger.info("📐 Spec schedule (longest first):")
+    for f in ordered:
+        if f in durations:
+            logger.info(f"   📐 {f}: ~{estimates[f] / 1000:.1f}s (history)")
+        elif rates:
+            logger.info(f"   📐 {f}: ~{estimates[f] / 1000:.1f}s (estimated from {sizes[f]} bytes)")
+        else:
+            logger.info(f"   📐 {f}: {sizes[f]} bytes (no history yet)")
+    return ordered
+
+
+# ----------------------------
+# CORE: RUN PLAYWRIGHT TESTS (JS)
+# ----------------------------
+
+def run_spec_file(test_file, target_env_url, env_vars, log_dir, parallel=False, job=None, results_dir=None):
+    """Runs a single spec file in its own Playwright process and writes its log."""
+    logger.info(f"🔄 Executing Test File: {test_file}")
+
+    test_path = os.path.join(PROJECT_ROOT, "tests", test_file)
+    if not os.path.isfile(test_path):
+        logger.error(f"❌ Test file NOT FOUND: {test_path}")
+        set_job_progress(job, test_file, "NOT_FOUND")
+        return error_result(test_file, "spec", "NOT_FOUND", f"Test file not found: {test_path}",
+                            now_iso(), time.perf_counter())
+
+    set_job_progress(job, test_file, "RUNNING")
+    started_at, started = now_iso(), time.perf_counter()
+
+    spec_name = test_file.replace(".spec.js", "")
+    # The JSON reporter writes its file when the run ends, alongside the line output
+    report_filename = f"{spec_name}.report.json"
+    report_path = os.path.join(log_dir, report_filename)
+    if os.path.exists(report_path):
+        os.remove(report_path)
+    cmd = [
+        NODE_PATH,
+        PLAYWRIGHT_CLI,
+        "test",
+        test_path,
+        "--reporter=line,json",
+        # Each spec gets its own output dir, Playwright wipes it at start-up
+        f"--output={os.path.join(results_dir or TEST_RESULTS_DIR, spec_name)}"
+    ]
+    if env_vars.get("PLAYWRIGHT_HEADED") == "1":
+        cmd.append("--headed")
+    if parallel:
+        # The worker pool is the unit of parallelism, avoid N x CPU browsers
+        cmd.append("--workers=1")
+
+    log_filename = test_file.replace(".spec.js", ".log")
+    try:
+        logger.critical(f"PLAYWRIGHT CMD: {' '.join(cmd)}")
+
+        prefix = f"[{spec_name}] " if parallel else ""
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        fixed_sleep_ms = 0
+        phases = []
+        counts = {}
+        with open(os.path.join(log_dir, log_filename), "w", encoding="utf-8") as log:
+            header = f"--- {test_file} ---\n--- ENV: {target_env_url} ---\n\n"
+            log.write(header)
+            # Match line numbers point into the log file, header included
+            classifier = LogClassifier(first_line=header.count("\n") + 1)
             process = subprocess.Popen(
                 cmd,
                 cwd=PROJECT_ROOT,
@@ -272,251 +862,636 @@ def run_test_group(test_files, project_name, target_env_url):
                 text=True,
                 encoding="utf-8",
                 errors="replace",
-                env=env_vars
+                # env_vars is shared by the worker threads, the report path is per spec
+                env={**env_vars, "PLAYWRIGHT_JSON_OUTPUT_FILE": report_path}
             )
 
-            stdout = ""
-            for line in process.stdout:
-                sys.stdout.write(line)
-                stdout += line
+            for line in output_lines(process):
+                sys.stdout.write(prefix + line)
+                publish_job_output(job, test_file, line)
+                log.write(line)
+                tail.append(line[:OUTPUT_TAIL_LINE_CHARS])
+                fixed_sleep_ms += sum(int(ms) for ms in FIXED_SLEEP_PATTERN.findall(line))
+                phases.extend(parse_phases(line))
+                parse_reporter_counts(line, counts)
+                classifier.feed(line)
 
             process.wait()
 
-            status = "PASS" if "passed" in stdout.lower() else "FAIL"
-            logger.info(f"{'✅' if status == 'PASS' else '❌'} Finished {test_file}: {status}")
+            # The JSON report has exact counts and per-test detail; the summary lines are the fallback
+            report = read_json_report(report_path)
+            cases = []
+            if report:
+                counts = report["counts"] or counts
+                cases = report["cases"]
+                logger.info(f"🧪 {test_file}: {len(cases)} tests {counts}")
+
+            status = spec_status(process.returncode, counts, classifier)
+            timing = make_timing(test_file, "spec", status, process.returncode, started_at, started, phases)
+            # Outcome goes at the end: the output above was written as it streamed
+            log.write(
+                f"\n--- {test_file} [{status}] ---\n"
+                f"--- DURATION: {timing['durationMs']}ms ---\n"
+                f"--- FIXED SLEEP: {fixed_sleep_ms}ms ---\n"
+            )
+        logger.info(f"{'✅' if status == 'PASS' else '❌'} Finished {test_file}: {status} in {timing['durationMs'] / 1000:.1f}s")
+        set_job_progress(job, test_file, status)
+
+        return {
+            "file": test_file,
+            "status": status,
+            "exitCode": process.returncode,
+            "reporter": counts,
+            "failureMatches": classifier.matches,
+            "cases": cases,
+            "outputTail": "".join(tail),
+            "fixedSleepMs": fixed_sleep_ms,
+            "timing": timing,
+            "logFile": get_log_url(log_dir, log_filename)
+        }
+
+    except Exception as e:
+        logger.exception(f"❌ Exception running {test_file}: {e}")
+        set_job_progress(job, test_file, "FAIL")
+        log_url = get_log_url(log_dir, log_filename) if os.path.exists(os.path.join(log_dir, log_filename)) else None
+        return error_result(test_file, "spec", "FAIL", f"Exception running {test_file}: {e}", started_at, started,
+                            log_url)
 
-            log_filename = test_file.replace(".spec.js", ".log")
-            with open(os.path.join(log_dir, log_filename), "w", encoding="utf-8") as f:
-                f.write(
-                    f"--- {test_file} [{status}] ---\n"
-                    f"--- ENV: {target_env_url} ---\n\n"
-                    f"{stdout}"
-                )
 
-            results.append({
-                "file": test_file,
-                "status": status,
-                "stdout": stdout,
-                "logFile": f"/logs/{project_name}/{log_filename}"
-            })
+def run_test_group(test_files, project_name, target_env_url, workers=None, log_dir=None, job=None, extra_env=None,
+                   results_dir=None):
+    if not test_files:
+        logger.warning("🚫 No test files configured. Skipping Playwright execution.")
+        return []
+
+    workers = max(1, min(workers or PLAYWRIGHT_WORKERS, len(test_files)))
+
+    logger.info(f"🚀 Starting Playwright Test Group: {project_name}")
+    logger.info(f"🎯 Target Environment: {target_env_url}")
+    logger.info(f"🧵 Workers: {workers}")
+    logger.critical(f"TEST FILES RECEIVED: {test_files}")
+
+    log_dir = log_dir or get_log_dir(project_name)
+    os.makedirs(log_dir, exist_ok=True)
 
-            full_log += f"\n--- {test_file} [{status}] ---\n{stdout}\n"
+    # Prepare environment variables
+    env_vars = os.environ.copy()
+    env_vars.update(extra_env or {})
+    env_vars["BASE_URL"] = target_env_url
+    env_vars["TEST_ENV_NAME"] = get_test_env_name(target_env_url)
 
-        except Exception as e:
-            logger.exception(f"❌ Exception running {test_file}: {e}")
+    logger.info(f"⚙️ ENV Configured: TEST_ENV_NAME={env_vars['TEST_ENV_NAME']}")
 
-    # Save combined log
-    with open(os.path.join(log_dir, f"{project_name}_combined.log"), "w", encoding="utf-8") as f:
-        f.write(full_log)
+    parallel = workers > 1
+    # Serial runs keep the configured order, specs may rely on it
+    run_order = schedule_longest_first(test_files) if parallel else test_files
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="spec") as pool:
+        futures = {
+            test_file: pool.submit(run_spec_file, test_file, target_env_url, env_vars, log_dir, parallel, job, results_dir)
+            for test_file in run_order
+        }
+        # Keep results in configured order regardless of completion order; every spec has one
+        results = [futures[f].result() for f in test_files]
+
+    log_fixed_sleep_report(results)
+
+    # Save combined log: the spec logs copied in configured order, a chunk at a time
+    with open(os.path.join(log_dir, f"{project_name}_combined.log"), "w", encoding="utf-8") as combined:
+        for r in results:
+            combined.write(f"\n--- {r['file']} [{r['status']}] ---\n")
+            if not r["logFile"]:
+                combined.write(f"{r['error']}\n")
+                continue
+            with open(os.path.join(log_dir, os.path.basename(r["logFile"])), "r", encoding="utf-8") as f:
+                shutil.copyfileobj(f, combined)
 
     return results
 
 
+def log_fixed_sleep_report(results):
+    """Logs the fixed-sleep time each spec spent, largest first."""
+    slept = sorted((r for r in results if r.get("fixedSleepMs")), key=lambda r: r["fixedSleepMs"], reverse=True)
+    if not slept:
+        logger.info("⏱️ No fixed sleeps recorded")
+        return
+    total = sum(r["fixedSleepMs"] for r in slept)
+    logger.info(f"⏸️ Fixed-sleep report ({total / 1000:.1f}s total):")
+    for r in slept:
+        logger.info(f"   ⏸️ {r['file']}: {r['fixedSleepMs'] / 1000:.1f}s")
+
+
 # ----------------------------
 # CORE: RUN PYTHON SCRIPTS
 # ----------------------------
-def run_python_scripts(scripts_list, project_name, target_env_url):
+def run_python_scripts(scripts_list, project_name, target_env_url, log_dir=None, job=None, extra_env=None):
+    """Runs the post-execution scripts in order; returns a result (with its timing) per script."""
     if not scripts_list:
         logger.info("➡️ No Python scripts configured to run.")
-        return
+        return []
 
     logger.info(f"🐍 Starting Python Post-Execution Scripts for {project_name}")
     
-    log_dir = os.path.join(PROJECT_ROOT, "logs", project_name)
+    log_dir = log_dir or get_log_dir(project_name)
     os.makedirs(log_dir, exist_ok=True)
     
     python_executable = sys.executable 
     env_vars = os.environ.copy()
+    env_vars.update(extra_env or {})
     env_vars["PYTHONIOENCODING"] = "utf-8"
     env_vars["BASE_URL"] = target_env_url
-    
-    # Determine ENV logic
-    if "qa" in target_env_url.lower():
-        env_vars["TEST_ENV_NAME"] = "QA"
-    else:
-        env_vars["TEST_ENV_NAME"] = "DEV"
+    env_vars["TEST_ENV_NAME"] = get_test_env_name(target_env_url)
 
+    results = []
     for script_file in scripts_list:
         script_path = os.path.join(PROJECT_ROOT, script_file)
+        # Progress, output events, results and timings are all keyed by the bare file name, as specs are
+        script_name = os.path.basename(script_file)
         
         if not os.path.exists(script_path):
             logger.warning(f"⚠️ Script not found: {script_path}. Skipping.")
+            set_job_progress(job, script_name, "NOT_FOUND")
+            results.append(error_result(script_name, "script", "NOT_FOUND",
+                                        f"Script not found: {script_path}", now_iso(), time.perf_counter()))
             continue
 
         logger.info(f"🔥 Running Script: {script_file} [ENV: {env_vars['TEST_ENV_NAME']}]")
+        set_job_progress(job, script_name, "RUNNING")
+        started_at, started = now_iso(), time.perf_counter()
         
         cmd = [python_executable, script_path]
-        status = "PASS"
-        output_content = ""
+        status = "FAIL"
+        exit_code = None
+        tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        phases = []
+        classifier = LogClassifier()
+
+        log_filename = script_name.replace('.py', '.log')
+        if log_filename == script_name: log_filename += ".log"
 
         try:
-            result = subprocess.run(
-                cmd, cwd=PROJECT_ROOT, capture_output=True, text=True, 
-                encoding="utf-8", check=False, env=env_vars
-            )
-            
-            output_content = result.stdout
-            if result.stderr:
-                output_content += "\n--- STDERR ---\n" + result.stderr
-
-            print(output_content) # Show output in console too
-
-            if result.returncode != 0:
-                status = "FAIL"
-                logger.error(f"❌ Script failed (Exit Code {result.returncode})")
-            elif "FAIL" in output_content or "Error:" in output_content:
-                status = "FAIL"
-                logger.error("❌ Script output contains failure keywords.")
-            else:
-                logger.info("✅ Script finished successfully.")
-
-        except Exception as e:
-            status = "FAIL"
-            logger.exception(f"❌ Exception executing script {script_file}: {e}")
-            output_content += f"\nException: {e}"
-
-        # Write Log
-        log_filename = os.path.basename(script_file).replace('.py', '.log')
-        if log_filename == os.path.basename(script_file): log_filename += ".log"
-        
-        try:
-            with open(os.path.join(log_dir, log_filename), "w", encoding="utf-8") as f:
-                f.write(f"--- {script_file} [{status}] ---\n--- ENV: {target_env_url} ---\n{output_content}")
-        except Exception as e:
+            with open(os.path.join(log_dir, log_filename), "w", encoding="utf-8") as log:
+                header = f"--- {script_file} ---\n--- ENV: {target_env_url} ---\n"
+                log.write(header)
+                classifier = LogClassifier(first_line=header.count("\n") + 1)
+                try:
+                    # stderr is merged in, so the log keeps the order things happened in
+                    process = subprocess.Popen(
+                        cmd, cwd=PROJECT_ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                        text=True, encoding="utf-8", errors="replace", env=env_vars
+                    )
+                    for line in output_lines(process):
+                        sys.stdout.write(line) # Show output in console too
+                        publish_job_output(job, script_name, line)
+                        log.write(line)
+                        tail.append(line[:OUTPUT_TAIL_LINE_CHARS])
+                        phases.extend(parse_phases(line))
+                        classifier.feed(line)
+                    exit_code = process.wait()
+
+                    status = script_status(exit_code, classifier)
+                    if exit_code != 0:
+                        logger.error(f"❌ Script failed (Exit Code {exit_code})")
+                    elif status == "FAIL":
+                        logger.error("❌ Script output contains failure keywords.")
+                    else:
+                        logger.info("✅ Script finished successfully.")
+
+                except Exception as e:
+                    logger.exception(f"❌ Exception executing script {script_file}: {e}")
+                    log.write(f"\nException: {e}\n")
+
+                timing = make_timing(script_name, "script", status, exit_code, started_at, started, phases)
+                log.write(f"\n--- {script_file} [{status}] ---\n--- DURATION: {timing['durationMs']}ms ---\n")
+        except OSError as e:
             logger.error(f"❌ Failed to write log for {script_file}: {e}")
+            timing = make_timing(script_name, "script", status, exit_code, started_at, started, phases)
+
+        set_job_progress(job, script_name, status)
+        logger.info(f"⏱️ {script_file} took {timing['durationMs'] / 1000:.1f}s")
+
+        results.append({
+            "file": script_name,
+            "status": status,
+            "exitCode": exit_code,
+            "failureMatches": classifier.matches,
+            "outputTail": "".join(tail),
+            "timing": timing,
+            "logFile": get_log_url(log_dir, log_filename)
+        })
 
     logger.info("🏁 Python scripts execution completed.")
-
-
-# ----------------------------
-# LOG ANALYSIS
-# ----------------------------
-def check_log_file(log_path):
-    if not os.path.exists(log_path): return "FAIL"
-    with open(log_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    failure_patterns = [r"\bFAIL\b", r"Error:", r"Test timeout", r"AssertionError", r"Traceback"]
-    for pattern in failure_patterns:
-        if re.search(pattern, content, re.IGNORECASE):
-            return "FAIL"
-    return "PASS"
-
-def process_logs_for_project(project_name):
-    logger.info(f"📊 Analyzing logs for project: {project_name}")
-    log_dir = os.path.join(PROJECT_ROOT, "logs", project_name)
-    
-    if not os.path.exists(log_dir):
-        logger.warning("⚠️ No logs directory found.")
-        return {"projectStatus": "FAIL", "tests": []}
-
-    test_results = []
-    project_status = "PASS"
-
-    for file_name in os.listdir(log_dir):
-        if file_name.endswith(".log") and "combined" not in file_name.lower():
-            status = check_log_file(os.path.join(log_dir, file_name))
-            if status == "FAIL": project_status = "FAIL"
-
-            display_name = file_name.replace(".log", ".spec.js") 
-            # Check if it was a python script log
-            if os.path.exists(os.path.join(PROJECT_ROOT, "tests", file_name.replace(".log", ".py"))):
-                display_name = file_name.replace(".log", ".py")
-
-            test_results.append({
-                "file": display_name, "status": status, 
-                "logFile": f"/logs/{project_name}/{file_name}"
-            })
-    
-    logger.info(f"📊 Analysis Complete. Status: {project_status}")
-    return {"projectStatus": project_status, "tests": test_results}
+    return results
 
 
 # ----------------------------
 # MAIN ORCHESTRATOR
 # ----------------------------
-def execute_and_process(project_name, test_files, env_key):
-    log_dir = os.path.join(PROJECT_ROOT, "logs", project_name)
-    if os.path.exists(log_dir):
+def execute_and_process(project_name, test_files, env_key, workers=None, job=None, headed=False):
+    if env_key not in ENV_URLS:
+        raise ValueError(f"Unknown env key '{env_key}'")
+    log_dir = get_log_dir(project_name, env_key)
+    # Nothing outside logs/ and test-results/ is ever deleted, whatever the path resolves to
+    if os.path.isdir(log_dir) and is_below(log_dir, LOGS_DIR):
         for f in os.listdir(log_dir):
-            os.remove(os.path.join(log_dir, f))
+            path = os.path.join(log_dir, f)
+            if os.path.isfile(path) and is_below(path, LOGS_DIR):
+                os.remove(path)
+
+    # Only one job runs per project / env: earlier runs' Playwright output can go
+    run_id = job["id"] if job else datetime.now().strftime("%Y%m%d-%H%M%S")
+    results_dir = get_results_dir(project_name, env_key, run_id)
+    previous_runs = os.path.dirname(results_dir)
+    if os.path.isdir(previous_runs) and is_below(previous_runs, TEST_RESULTS_DIR):
+        for d in os.listdir(previous_runs):
+            path = os.path.join(previous_runs, d)
+            if is_below(path, TEST_RESULTS_DIR):
+                shutil.rmtree(path, ignore_errors=True)
 
     logger.info(f"\n{'='*40}\n🚀 STARTING EXECUTION: {project_name} [{env_key}]\n{'='*40}")
     
-    clear_db()
-    
-    target_url = ENV_URLS.get(env_key, "UNKNOWN_ENV")
+    target_url = ENV_URLS[env_key]
     platform_label = env_key.upper().replace('_', ' ')
-    
-    if target_url == "UNKNOWN_ENV":
-        logger.warning(f"⚠️ Unknown env key '{env_key}', defaulting to DEV.")
-        target_url = ENV_URLS['cdbu_dev']
 
-    # 1. Run Playwright
-    run_test_group(test_files, project_name, target_url)
-    
-    # 2. Run Python
-    run_python_scripts(PYTHON_POST_EXECUTION_SCRIPTS, project_name, target_url)
+    # Runner-side setup (tunnel, login) is timed as its own entry
+    setup_phases = []
+    setup_started_at, setup_started = now_iso(), time.perf_counter()
+
+    # 0. One DB tunnel per environment on its own ephemeral port, handed to
+    #    scripts via DB_TUNNEL_PORT_<ENV> and to specs (utils/db.js) via DB_PORT
+    test_env_name = get_test_env_name(target_url)
+    # Specs get --headed from this, scripts launch their browsers from it
+    extra_env = {"PLAYWRIGHT_HEADED": "1" if headed else "0"}
+    logger.info(f"🖥️ Browser mode: {'headed' if headed else 'headless'}")
+    tunnel_port = None
+    # Everything after the acquire is inside the try, so a failing login still releases the tunnel
+    try:
+        if test_files or PYTHON_POST_EXECUTION_SCRIPTS:
+            with timed_phase(setup_phases, "db tunnel"):
+                tunnel_port = acquire_db_tunnel(test_env_name)
+        if tunnel_port:
+            extra_env[tunnel_manager.shared_port_var(test_env_name)] = str(tunnel_port)
+            extra_env["DB_HOST"] = "127.0.0.1"
+            extra_env["DB_PORT"] = str(tunnel_port)
+
+        # 0b. Sign in once; specs (playwright.config.mjs) and scripts start from this session
+        if test_files or PYTHON_POST_EXECUTION_SCRIPTS:
+            with timed_phase(setup_phases, "login"):
+                storage_state = ensure_storage_state(env_key, target_url, test_env_name, job)
+            if storage_state:
+                extra_env["STORAGE_STATE"] = storage_state
+
+        timings = [make_timing("(setup)", "setup", "PASS", None, setup_started_at, setup_started, setup_phases)]
+
+        # 1. Run Playwright
+        spec_results = run_test_group(test_files, project_name, target_url, workers, log_dir, job, extra_env,
+                                      results_dir)
+        
+        # 2. Run Python
+        script_results = run_python_scripts(PYTHON_POST_EXECUTION_SCRIPTS, project_name, target_url, log_dir, job, extra_env)
+    finally:
+        if tunnel_port:
+            tunnel_manager.release(test_env_name)
     
-    # 3. Analyze & Save
-    result = process_logs_for_project(project_name)
-    tests = result.get('tests', [])
+    # 3. Save: every spec / script was classified while its output was captured
+    run_results = spec_results + script_results
+    timings.extend(r["timing"] for r in run_results)
+    tests = [test_entry(r) for r in run_results]
     passed = len([t for t in tests if t['status'] == 'PASS'])
     failed = len(tests) - passed
-    failed_list = [{'file': t['file'], 'logFile': t['logFile']} for t in tests if t['status'] == 'FAIL']
+    result = {"projectStatus": "PASS" if tests and not failed else "FAIL", "tests": tests}
+    logger.info(f"📊 Results: {result['projectStatus']} ({passed} passed, {failed} failed)")
     
-    execution_id = save_execution_to_db(
-        project_name, len(tests), passed, failed, failed_list, platform_label
-    )
+    execution_id = save_execution_to_db(project_name, tests, timings, platform_label)
+    schedule_history_prune()
     
     result['platform'] = platform_label
     result['executionId'] = execution_id
+    result['timings'] = timings
     
     logger.info(f"🏁 EXECUTION FINISHED. Passed: {passed}, Failed: {failed}")
     return result
 
 
+# ----------------------------
+# JOB MANAGEMENT
+# ----------------------------
+# Suites run on a background executor; the trigger endpoints only enqueue a job.
+job_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+JOBS = {}
+JOB_STREAMS = {}
+JOBS_LOCK = threading.Lock()
+
+class JobStream:
+    """Bounded ring buffer of output lines for one job, with blocking reads for subscribers.
+
+    Lines are cut to OUTPUT_TAIL_LINE_CHARS like the result tail, and the buffer is
+    shrunk to the last OUTPUT_TAIL_LINES on close, so finished jobs kept for the
+    status API don't each hold a full buffer.
+    """
+
+    def __init__(self, max_lines=JOB_STREAM_BUFFER_LINES):
+        self.lines = deque(maxlen=max_lines)
+        self.seq = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def publish(self, source, line):
+        with self.cond:
+            self.seq += 1
+            self.lines.append((self.seq, {"source": source, "line": line.rstrip("\r\n")[:OUTPUT_TAIL_LINE_CHARS]}))
+            self.cond.notify_all()
+
+    def close(self, keep_lines=OUTPUT_TAIL_LINES):
+        with self.cond:
+            self.closed = True
+            # Sequence numbers are kept, so late subscribers get a gap event for the rest
+            self.lines = deque(self.lines, maxlen=keep_lines)
+            self.cond.notify_all()
+
+    def read_since(self, last_seq, timeout=15):
+        """Returns (events after last_seq, number of lines lost to the ring buffer, closed)."""
+        with self.cond:
+            if self.seq <= last_seq and not self.closed:
+                self.cond.wait(timeout)
+            events = [(seq, payload) for seq, payload in self.lines if seq > last_seq]
+            oldest = events[0][0] if events else self.seq + 1
+            return events, max(0, oldest - last_seq - 1), self.closed
+
+def publish_job_output(job, source, line):
+    if job is None:
+        return
+    stream = JOB_STREAMS.get(job["id"])
+    if stream:
+        stream.publish(source, line)
+
+def set_job_progress(job, file_name, status):
+    """Records the status of a single spec/script on the job (no-op without a job)."""
+    if job is None:
+        return
+    with JOBS_LOCK:
+        job["progress"][file_name] = status
+
+def update_job(job, **fields):
+    with JOBS_LOCK:
+        job.update(fields)
+
+def snapshot_job(job, include_result=True):
+    """Returns a JSON-safe copy of the job taken under the lock."""
+    with JOBS_LOCK:
+        data = {k: v for k, v in job.items() if k != "result"}
+        data["progress"] = dict(job["progress"])
+        if include_result:
+            data["result"] = job["result"]
+    return data
+
+def find_active_job(project_name, env_key):
+    """Queued / running job for a project and env; the caller holds JOBS_LOCK."""
+    for job in JOBS.values():
+        if job["project"] == project_name and job["env"] == env_key and job["status"] in ("queued", "running"):
+            return job
+    return None
+
+def prune_finished_jobs():
+    with JOBS_LOCK:
+        finished = [j for j in JOBS.values() if j["status"] in ("completed", "failed")]
+        finished.sort(key=lambda j: j["finishedAt"] or "")
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del JOBS[job["id"]]
+            JOB_STREAMS.pop(job["id"], None)
+
+def run_job(job, test_files, workers):
+    update_job(job, status="running", startedAt=datetime.now().isoformat(timespec="seconds"))
+    logger.info(f"🧾 Job {job['id']} started: {job['project']} [{job['env']}]")
+    try:
+        result = execute_and_process(job["project"], test_files, job["env"], workers, job, job["headed"])
+        update_job(job, status="completed", result=result,
+                   finishedAt=datetime.now().isoformat(timespec="seconds"))
+        logger.info(f"🧾 Job {job['id']} completed.")
+    except Exception as e:
+        logger.exception(f"❌ Job {job['id']} failed: {e}")
+        update_job(job, status="failed", error=str(e),
+                   finishedAt=datetime.now().isoformat(timespec="seconds"))
+    finally:
+        JOB_STREAMS[job["id"]].close()
+        prune_finished_jobs()
+
+def resolve_headed(project_name, requested=None):
+    """Request flag wins, then the project's setting, then the global default."""
+    if requested is not None:
+        return requested
+    return PROJECT_HEADED.get(project_name, DEFAULT_HEADED)
+
+def parse_flag(value):
+    """Query-string boolean ("1"/"true"/"yes" vs "0"/"false"/"no")."""
+    value = value.strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(value)
+
+def submit_job(project_name, test_files, env_key, workers=None, headed=None):
+    """Queues a suite run and returns the job; an identical running job is reused."""
+    job = {
+        "id": uuid.uuid4().hex[:12],
+        "project": project_name,
+        "env": env_key,
+        "status": "queued",
+        "headed": resolve_headed(project_name, headed),
+        "createdAt": datetime.now().isoformat(timespec="seconds"),
+        "startedAt": None,
+        "finishedAt": None,
+        "progress": {f: "PENDING" for f in list(test_files) + [os.path.basename(s) for s in PYTHON_POST_EXECUTION_SCRIPTS]},
+        "result": None,
+        "error": None
+    }
+    # Lookup and insert under one lock, so two requests can't both start a job
+    with JOBS_LOCK:
+        active = find_active_job(project_name, env_key)
+        if active:
+            logger.info(f"🧾 Job {active['id']} already active for {project_name} [{env_key}]")
+            return active, False
+        JOBS[job["id"]] = job
+        JOB_STREAMS[job["id"]] = JobStream()
+    job_executor.submit(run_job, job, test_files, workers)
+    logger.info(f"🧾 Job {job['id']} queued: {project_name} [{env_key}]")
+    return job, True
+
+def trigger_job_response(project_name, test_files, env_key):
+    # env_key names log, results and auth paths: only configured environments get that far
+    if env_key not in ENV_URLS:
+        return jsonify({'success': False, 'error': f"env must be one of {', '.join(ENV_URLS)}"}), 400
+    workers = request.args.get('workers', type=int)
+    # Parsed here rather than via type=, which would turn a bad value into None (headless)
+    try:
+        headed = parse_flag(request.args['headed']) if 'headed' in request.args else None
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid query parameter: headed={e}'}), 400
+    job, created = submit_job(project_name, test_files, env_key, workers, headed)
+    return jsonify({
+        'success': True,
+        'jobId': job['id'],
+        'status': job['status'],
+        'created': created,
+        'statusUrl': f"/api/jobs/{job['id']}"
+    }), 202
+
+
 # ----------------------------
 # API ENDPOINTS (TRIGGERS)
 # ----------------------------
 @app.route("/run-china-tests")
 def run_china_tests():
     env = request.args.get('env', 'cdbu_dev')
-    return jsonify(execute_and_process("China Project", CHINA_TEST_FILES, env))
+    return trigger_job_response("China Project", CHINA_TEST_FILES, env)
 
 @app.route("/run-nrp-tests")
 def run_nrp_tests():
     env = request.args.get('env', 'nrp_dev')
-    return jsonify(execute_and_process("NRP Project", NRP_TEST_FILES, env))
+    return trigger_job_response("NRP Project", NRP_TEST_FILES, env)
 
 @app.route("/run-psbu-tests")
 def run_psbu_tests():
     env = request.args.get('env', 'cdbu_dev')
-    return jsonify(execute_and_process("PSBU Project", PSBU_TEST_FILES, env))
+    return trigger_job_response("PSBU Project", PSBU_TEST_FILES, env)
+
+@app.route('/api/jobs')
+def list_jobs():
+    with JOBS_LOCK:
+        jobs = list(JOBS.values())
+    jobs = [snapshot_job(j, include_result=False) for j in jobs]
+    jobs.sort(key=lambda j: j["createdAt"], reverse=True)
+    return jsonify({'success': True, 'jobs': jobs})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'Unknown job {job_id}'}), 404
+    return jsonify({'success': True, 'job': snapshot_job(job)})
+
+@app.route('/api/jobs/<job_id>/stream')
+def stream_job(job_id):
+    """Server-Sent Events feed of a job's output; Last-Event-ID resumes from the ring buffer."""
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+        stream = JOB_STREAMS.get(job_id)
+    if job is None or stream is None:
+        return jsonify({'success': False, 'error': f'Unknown job {job_id}'}), 404
+
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('since') or 0
+    try:
+        last_id = int(last_id)
+    except ValueError:
+        last_id = 0
+
+    def generate(last_seq):
+        while True:
+            events, dropped, closed = stream.read_since(last_seq)
+            if dropped:
+                yield f"event: gap\ndata: {json.dumps({'dropped': dropped})}\n\n"
+            for seq, payload in events:
+                yield f"id: {seq}\nevent: output\ndata: {json.dumps(payload)}\n\n"
+                last_seq = seq
+            if closed:
+                final = snapshot_job(job, include_result=False)
+                yield f"event: end\ndata: {json.dumps({'status': final['status']})}\n\n"
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    return Response(generate(last_id), mimetype='text/event-stream',
+                    headers={'X-Accel-Buffering': 'no'})
 
 @app.route('/api/clear-history', methods=['POST'])
 def clear_history():
     return jsonify({'success': clear_db()})
 
+def stats_filters():
+    """WHERE clause for the test_daily_stats rollup from ?project=&platform=&from=&to=."""
+    where, params = [], []
+    if request.args.get('project'):
+        where.append('project_name = ?')
+        params.append(request.args['project'])
+    if request.args.get('platform'):
+        where.append('platform = ?')
+        params.append(request.args['platform'])
+    if request.args.get('from'):
+        where.append('day >= ?')
+        params.append(parse_history_date(request.args['from']))
+    if request.args.get('to'):
+        where.append('day <= ?')
+        params.append(parse_history_date(request.args['to']))
+    return ("WHERE " + " AND ".join(where)) if where else "", params
+
+def pass_rate(passed, total):
+    return round(100.0 * passed / total, 1) if total else None
+
 @app.route('/api/stats')
 def get_stats():
+    """Totals from the daily rollup, optionally filtered by project / platform / date range."""
     logger.info("📥 API Request: /api/stats")
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT COUNT(*) FROM test_executions')
-        total = c.fetchone()[0]
-        c.execute('SELECT SUM(total_tests), SUM(passed_tests), SUM(failed_tests) FROM test_executions')
+        where, params = stats_filters()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid query parameter: {e}'}), 400
+    try:
+        c = history_store.reader().cursor()
+        c.execute(f'''
+            SELECT SUM(executions), SUM(total_tests), SUM(passed_tests), SUM(failed_tests)
+            FROM test_daily_stats {where}
+        ''', params)
         stats = c.fetchone()
-        conn.close()
         return jsonify({
-            'success': True, 'totalExecutions': total,
-            'totalTests': stats[0] or 0, 'totalPassed': stats[1] or 0, 'totalFailed': stats[2] or 0
+            'success': True, 'totalExecutions': stats[0] or 0,
+            'totalTests': stats[1] or 0, 'totalPassed': stats[2] or 0, 'totalFailed': stats[3] or 0,
+            'passRate': pass_rate(stats[2] or 0, stats[1] or 0)
         })
     except Exception as e:
         logger.error(f"❌ Error fetching stats: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+# Trend buckets over the rollup's day column (weeks start on Monday)
+TREND_BUCKETS = {
+    "day": "day",
+    "week": "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days')",
+    "month": "strftime('%Y-%m', day)",
+}
+
+@app.route('/api/stats/trends')
+def get_stats_trends():
+    """Executions and pass rate per ?bucket=day|week|month, oldest first."""
+    bucket = request.args.get('bucket', 'day')
+    logger.info(f"📥 API Request: /api/stats/trends (bucket={bucket})")
+    if bucket not in TREND_BUCKETS:
+        return jsonify({'success': False, 'error': f"bucket must be one of {', '.join(TREND_BUCKETS)}"}), 400
+    try:
+        where, params = stats_filters()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid query parameter: {e}'}), 400
+    try:
+        c = history_store.reader().cursor()
+        c.execute(f'''
+            SELECT {TREND_BUCKETS[bucket]} AS period,
+                   SUM(executions), SUM(total_tests), SUM(passed_tests), SUM(failed_tests)
+            FROM test_daily_stats {where}
+            GROUP BY period
+            ORDER BY period
+        ''', params)
+        trends = [{
+            'period': row[0],
+            'executions': row[1],
+            'totalTests': row[2],
+            'passed': row[3],
+            'failed': row[4],
+            'passRate': pass_rate(row[3], row[2])
+        } for row in c.fetchall()]
+        return jsonify({'success': True, 'bucket': bucket, 'trends': trends})
+    except Exception as e:
+        logger.error(f"❌ Error fetching trends: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
 
 # ----------------------------
 # ENTRY POINT
@@ -527,6 +1502,7 @@ if __name__ == "__main__":
     logger.info("="*50)
     
     if init_db():
+        schedule_history_prune()
         logger.info(f"📂 Project Root: {PROJECT_ROOT}")
         logger.info("🌐 Server listening on http://localhost:5000")
         app.run(port=5000, debug=False, use_reloader=False)
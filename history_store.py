@@ -0,0 +1,462 @@
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+
+# ==========================================
+# TEST HISTORY STORE (SQLite)
+# ==========================================
+# - WAL journal: dashboard reads never block on a job writing its results
+# - One writer thread owns the only write connection; writes are queued and
+#   whatever is waiting is committed together in one transaction
+# - Each reading thread gets its own read-only connection
+logger = logging.getLogger("TestRunner.history")
+
+# Bump when SCHEMA changes and add the step to migrate()
+SCHEMA_VERSION = 1
+
+# Queued writes committed in one transaction at most
+WRITE_BATCH_MAX = 64
+# Idle read connections kept for reuse; the dev server runs each request on a new thread
+READ_POOL_SIZE = 4
+BUSY_TIMEOUT_MS = 10000
+
+# Per-result fields kept in test_results.summary_json
+RESULT_SUMMARY_KEYS = ("reporter", "failureMatches", "error")
+
+SCHEMA = [
+    '''
+        CREATE TABLE IF NOT EXISTS test_executions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_name TEXT NOT NULL,
+            execution_date DATE NOT NULL,
+            execution_time TIME NOT NULL,
+            platform TEXT NOT NULL,
+            total_tests INTEGER NOT NULL,
+            passed_tests INTEGER NOT NULL,
+            failed_tests INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    # One row per spec / script result of an execution; summary_json holds the
+    # reporter counts and failure matches captured while it ran
+    '''
+        CREATE TABLE IF NOT EXISTS test_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            execution_id INTEGER NOT NULL REFERENCES test_executions (id) ON DELETE CASCADE,
+            file TEXT NOT NULL,
+            status TEXT NOT NULL,
+            log_file TEXT,
+            exit_code INTEGER,
+            summary_json TEXT
+        )
+    ''',
+    # One row per spec / script / runner setup step of an execution
+    '''
+        CREATE TABLE IF NOT EXISTS test_timings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            execution_id INTEGER NOT NULL REFERENCES test_executions (id) ON DELETE CASCADE,
+            file TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            status TEXT,
+            exit_code INTEGER,
+            started_at TEXT,
+            finished_at TEXT,
+            duration_ms INTEGER,
+            phases_json TEXT
+        )
+    ''',
+    # One row per Playwright test (from the JSON reporter) of an execution's specs
+    '''
+        CREATE TABLE IF NOT EXISTS test_cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            execution_id INTEGER NOT NULL REFERENCES test_executions (id) ON DELETE CASCADE,
+            file TEXT NOT NULL,
+            title TEXT NOT NULL,
+            project TEXT,
+            status TEXT NOT NULL,
+            outcome TEXT,
+            duration_ms INTEGER,
+            retries INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            error_location TEXT
+        )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_test_executions_created ON test_executions (created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_test_executions_project ON test_executions (project_name, created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_test_executions_platform ON test_executions (platform, created_at)',
+    # Local calendar day, the same day /api/stats rolls up; created_at is UTC
+    'CREATE INDEX IF NOT EXISTS idx_test_executions_date ON test_executions (execution_date)',
+    'CREATE INDEX IF NOT EXISTS idx_test_results_execution ON test_results (execution_id)',
+    'CREATE INDEX IF NOT EXISTS idx_test_results_file ON test_results (file, status)',
+    'CREATE INDEX IF NOT EXISTS idx_test_timings_execution ON test_timings (execution_id)',
+    'CREATE INDEX IF NOT EXISTS idx_test_timings_file ON test_timings (file)',
+    'CREATE INDEX IF NOT EXISTS idx_test_cases_execution ON test_cases (execution_id)',
+    'CREATE INDEX IF NOT EXISTS idx_test_cases_title ON test_cases (file, title)',
+    # Rollup per day / project / platform behind /api/stats, kept in step with
+    # test_executions by the triggers below (saves, pruning and clears alike)
+    '''
+        CREATE TABLE IF NOT EXISTS test_daily_stats (
+            day TEXT NOT NULL,
+            project_name TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            executions INTEGER NOT NULL DEFAULT 0,
+            total_tests INTEGER NOT NULL DEFAULT 0,
+            passed_tests INTEGER NOT NULL DEFAULT 0,
+            failed_tests INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, project_name, platform)
+        ) WITHOUT ROWID
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_insert AFTER INSERT ON test_executions
+        BEGIN
+            INSERT INTO test_daily_stats (day, project_name, platform, executions, total_tests, passed_tests, failed_tests)
+            VALUES (NEW.execution_date, NEW.project_name, NEW.platform, 1, NEW.total_tests, NEW.passed_tests, NEW.failed_tests)
+            ON CONFLICT (day, project_name, platform) DO UPDATE SET
+                executions = executions + 1,
+                total_tests = total_tests + excluded.total_tests,
+                passed_tests = passed_tests + excluded.passed_tests,
+                failed_tests = failed_tests + excluded.failed_tests;
+        END
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS trg_daily_stats_delete AFTER DELETE ON test_executions
+        BEGIN
+            UPDATE test_daily_stats SET
+                executions = executions - 1,
+                total_tests = total_tests - OLD.total_tests,
+                passed_tests = passed_tests - OLD.passed_tests,
+                failed_tests = failed_tests - OLD.failed_tests
+            WHERE day = OLD.execution_date AND project_name = OLD.project_name AND platform = OLD.platform;
+            DELETE FROM test_daily_stats
+            WHERE day = OLD.execution_date AND project_name = OLD.project_name AND platform = OLD.platform
+              AND executions <= 0;
+        END
+    ''',
+]
+
+_db_path = None
+_writer = None
+_local = threading.local()
+_read_pool = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+
+
+# ----------------------------
+# SCHEMA / MIGRATIONS
+# ----------------------------
+def _table_columns(c, table):
+    return [row[1] for row in c.execute(f"PRAGMA table_info({table})")]
+
+def migrate(c, version):
+    """Upgrades an existing database from `version` to SCHEMA_VERSION."""
+    if version < 1:
+        # v0 kept failed specs as a JSON blob on test_executions: move them to test_results.
+        # Passed specs were never recorded per file, so only failures can be backfilled.
+        if "failed_tests_json" in _table_columns(c, "test_executions"):
+            rows = c.execute('''
+                SELECT id, failed_tests_json FROM test_executions
+                WHERE failed_tests_json IS NOT NULL AND failed_tests_json NOT IN ('', '[]')
+                  AND id NOT IN (SELECT execution_id FROM test_results)
+            ''').fetchall()
+            backfill = []
+            for execution_id, failed_json in rows:
+                try:
+                    failed_list = json.loads(failed_json)
+                except ValueError:
+                    continue
+                backfill.extend((execution_id, t.get("file"), "FAIL", t.get("logFile"))
+                                for t in failed_list if isinstance(t, dict) and t.get("file"))
+            c.executemany(
+                'INSERT INTO test_results (execution_id, file, status, log_file) VALUES (?, ?, ?, ?)',
+                backfill
+            )
+            logger.info(f"🧱 Migrated {len(backfill)} failed test entries from {len(rows)} executions")
+            if sqlite3.sqlite_version_info >= (3, 35, 0):
+                c.execute('ALTER TABLE test_executions DROP COLUMN failed_tests_json')
+
+        # The insert trigger only counts new executions: seed the rollup from existing history
+        c.execute('DELETE FROM test_daily_stats')
+        c.execute('''
+            INSERT INTO test_daily_stats (day, project_name, platform, executions, total_tests, passed_tests, failed_tests)
+            SELECT execution_date, project_name, platform, COUNT(*),
+                   SUM(total_tests), SUM(passed_tests), SUM(failed_tests)
+            FROM test_executions
+            GROUP BY execution_date, project_name, platform
+        ''')
+
+
+def init(db_path):
+    """Creates / migrates the schema, switches to WAL and starts the writer thread."""
+    global _db_path, _writer
+    _db_path = db_path
+
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=BUSY_TIMEOUT_MS / 1000)
+    try:
+        c = conn.cursor()
+        # Freed pages are returned by prune() in small steps instead of a full VACUUM.
+        # Takes effect immediately on a new file, existing files need the one-off VACUUM below.
+        c.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        c.execute('BEGIN')
+        for statement in SCHEMA:
+            c.execute(statement)
+        version = c.execute('PRAGMA user_version').fetchone()[0]
+        if version < SCHEMA_VERSION:
+            logger.info(f"🧱 Migrating history schema v{version} -> v{SCHEMA_VERSION}")
+            migrate(c, version)
+            c.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        c.execute('COMMIT')
+        if c.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            logger.info("🧱 Enabling incremental auto-vacuum (one-off VACUUM)...")
+            c.execute('VACUUM')
+        # Persistent: stays on for every later connection to this file
+        c.execute('PRAGMA journal_mode = WAL')
+    finally:
+        conn.close()
+
+    if _writer is None:
+        _writer = _Writer(db_path)
+        _writer.start()
+
+
+# ----------------------------
+# CONNECTIONS
+# ----------------------------
+def _connect(readonly):
+    # Read connections move between threads through the pool (one user at a time)
+    conn = sqlite3.connect(_db_path, isolation_level=None, timeout=BUSY_TIMEOUT_MS / 1000,
+                           check_same_thread=not readonly)
+    conn.execute("PRAGMA foreign_keys = ON")
+    # WAL is safe with NORMAL: a crash can lose the last commit, never corrupt the file
+    conn.execute("PRAGMA synchronous = NORMAL")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+def reader():
+    """This thread's read-only connection, taken from the pool on first use until release_reader()."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != _db_path:
+        conn = None
+        while conn is None:
+            try:
+                path, conn = _read_pool.get_nowait()
+            except queue.Empty:
+                conn = _connect(readonly=True)
+                break
+            if path != _db_path:
+                conn.close()
+                conn = None
+        _local.conn, _local.path = conn, _db_path
+    return conn
+
+def release_reader():
+    """Returns this thread's read connection to the pool (closed when the pool is full)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    path = _local.path
+    _local.conn = _local.path = None
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _read_pool.put_nowait((path, conn))
+    except queue.Full:
+        conn.close()
+
+def _close_readers():
+    while True:
+        try:
+            _read_pool.get_nowait()[1].close()
+        except queue.Empty:
+            return
+
+
+class _Writer(threading.Thread):
+    """Owns the write connection and commits queued writes in batches."""
+
+    def __init__(self, db_path):
+        super().__init__(name="history-writer", daemon=True)
+        self.db_path = db_path
+        self.queue = queue.Queue()
+
+    def submit(self, fn):
+        future = Future()
+        self.queue.put((fn, future))
+        return future
+
+    def stop(self):
+        self.queue.put(None)
+        self.join(timeout=30)
+
+    def run(self):
+        conn = _connect(readonly=False)
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            stopping = False
+            while len(batch) < WRITE_BATCH_MAX:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+            if stopping:
+                break
+        conn.close()
+
+    def _commit(self, conn, batch):
+        # A savepoint per write: one failing write does not undo the rest of the batch
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, _ in batch:
+                conn.execute('SAVEPOINT write')
+                try:
+                    results.append((fn(conn), None))
+                    conn.execute('RELEASE write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO write')
+                    conn.execute('RELEASE write')
+                    results.append((None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), (value, error) in zip(batch, results):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+
+def write(fn, timeout=None):
+    """Runs fn(conn) on the writer thread inside a transaction and returns its result."""
+    if _writer is None:
+        raise RuntimeError("history_store.init() has not been called")
+    return _writer.submit(fn).result(timeout)
+
+def close():
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+    _close_readers()
+
+atexit.register(close)
+
+
+# ----------------------------
+# WRITES
+# ----------------------------
+def save_execution(project_name, tests, timings=None, platform='UAT'):
+    """Stores an execution with its per-file results, Playwright test cases and timings; returns the execution id."""
+    now = datetime.now()
+    passed_tests = len([t for t in tests if t['status'] == 'PASS'])
+
+    def insert(conn):
+        execution_id = conn.execute('''
+            INSERT INTO test_executions
+            (project_name, execution_date, execution_time, platform,
+             total_tests, passed_tests, failed_tests)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (project_name, now.strftime('%Y-%m-%d'), now.strftime('%H:%M:%S'), platform,
+              len(tests), passed_tests, len(tests) - passed_tests)).lastrowid
+
+        conn.executemany('''
+            INSERT INTO test_results (execution_id, file, status, log_file, exit_code, summary_json)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(execution_id, t['file'], t['status'], t.get('logFile'), t.get('exitCode'),
+               json.dumps({k: t[k] for k in RESULT_SUMMARY_KEYS if k in t}))
+              for t in tests])
+
+        conn.executemany('''
+            INSERT INTO test_timings
+            (execution_id, file, kind, status, exit_code, started_at, finished_at, duration_ms, phases_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(execution_id, t["file"], t["kind"], t["status"], t["exitCode"], t["startedAt"],
+               t["finishedAt"], t["durationMs"], json.dumps(t["phases"])) for t in timings or []])
+
+        conn.executemany('''
+            INSERT INTO test_cases
+            (execution_id, file, title, project, status, outcome, duration_ms, retries, error, error_location)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(execution_id, t['file'], case['title'], case.get('project'), case['status'], case.get('outcome'),
+               case.get('durationMs'), case.get('retries', 0), case.get('error'), case.get('errorLocation'))
+              for t in tests for case in t.get('cases') or []])
+        return execution_id
+
+    return write(insert)
+
+def _reclaim_free_pages(conn):
+    """Returns the freelist to the OS so the file shrinks after deletes.
+
+    sqlite3's execute() steps a statement once, and each step of
+    incremental_vacuum frees a single page, so keep stepping until the list is
+    empty. executescript() would run it to completion but commits first, which
+    would end the writer's batch transaction. Without incremental auto-vacuum
+    the pragma is a no-op, so stop as soon as a step frees nothing.
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        return
+    free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    for _ in range(free):
+        conn.execute('PRAGMA incremental_vacuum')
+        remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if remaining == 0 or remaining >= free:
+            break
+        free = remaining
+
+def clear():
+    """Deletes all history."""
+    def delete_all(conn):
+        conn.execute('DELETE FROM test_cases')
+        conn.execute('DELETE FROM test_timings')
+        conn.execute('DELETE FROM test_results')
+        conn.execute('DELETE FROM test_executions')
+        conn.execute('DELETE FROM test_daily_stats')
+        conn.execute('DELETE FROM sqlite_sequence WHERE name IN ("test_executions", "test_results", "test_timings", "test_cases")')
+        _reclaim_free_pages(conn)
+
+    write(delete_all)
+
+def prune(keep_runs, keep_days, batch):
+    """Deletes executions outside the retention window, `batch` per write; returns how many."""
+    if not keep_runs and not keep_days:
+        return 0
+
+    def delete_batch(conn):
+        # Results, timings and test cases go with their execution (ON DELETE CASCADE)
+        ids = [row[0] for row in conn.execute('''
+            SELECT id FROM (
+                SELECT id, created_at,
+                       ROW_NUMBER() OVER (PARTITION BY project_name ORDER BY created_at DESC, id DESC) AS rn
+                FROM test_executions
+            )
+            WHERE (? > 0 AND rn > ?) OR (? > 0 AND created_at < datetime('now', ?))
+            LIMIT ?
+        ''', (keep_runs, keep_runs, keep_days, f"-{keep_days} days", batch))]
+        if ids:
+            conn.execute(f'DELETE FROM test_executions WHERE id IN ({",".join("?" for _ in ids)})', ids)
+            _reclaim_free_pages(conn)
+        return len(ids)
+
+    # Separate writes, so job results queued meanwhile are not held behind the whole prune
+    pruned = 0
+    while True:
+        deleted = write(delete_batch)
+        pruned += deleted
+        if deleted < batch:
+            return pruned
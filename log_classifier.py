@@ -0,0 +1,118 @@
+import argparse
+import json
+import re
+import sys
+
+# ==========================================
+# LOG CLASSIFIER
+# ==========================================
+# One precompiled pattern (an alternation of named groups) is run over the log
+# line by line, so a log is scanned once with bounded memory. The classifier is
+# incremental: feed() it lines while a spec is still writing output, or use
+# classify_file() on a finished log.
+
+# (name, pattern) — matched case-insensitively, any match marks the log FAIL
+FAILURE_PATTERNS = [
+    ("fail", r"\bFAIL\b"),
+    ("error", r"Error:"),
+    ("timeout", r"Test timeout"),
+    ("assertion", r"AssertionError"),
+    ("traceback", r"Traceback"),
+]
+FAILURE_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in FAILURE_PATTERNS),
+    re.IGNORECASE
+)
+
+# Matches kept per log (the counts keep going)
+MAX_MATCHES = 50
+# Longest piece of a line read at once; longer lines are scanned in pieces
+MAX_LINE_CHARS = 64 * 1024
+# Matched line text kept per match
+MAX_TEXT_CHARS = 300
+
+
+def _excerpt(line, match):
+    """The matched line, or a window around the match when the line is long."""
+    if len(line) <= MAX_TEXT_CHARS:
+        return line.strip()
+    start = max(0, match.start() - MAX_TEXT_CHARS // 3)
+    return line[start:start + MAX_TEXT_CHARS].strip()
+
+
+class LogClassifier:
+    """Classifies a log incrementally; feed() lines in the order they were written."""
+
+    def __init__(self, max_matches=MAX_MATCHES, first_line=1):
+        # first_line: the log line the first fed line lands on (after a header the caller wrote)
+        self.max_matches = max_matches
+        self.lines = first_line - 1
+        self.matches = []
+        self.counts = {}
+        self._partial = False
+
+    def feed(self, line):
+        # A piece of an over-long line continues the current line number
+        if not self._partial:
+            self.lines += 1
+        self._partial = not line.endswith("\n")
+        for match in FAILURE_PATTERN.finditer(line):
+            name = match.lastgroup
+            self.counts[name] = self.counts.get(name, 0) + 1
+            if len(self.matches) < self.max_matches:
+                self.matches.append({
+                    "pattern": name,
+                    "line": self.lines,
+                    "text": _excerpt(line, match)
+                })
+
+    @property
+    def status(self):
+        return "FAIL" if self.counts else "PASS"
+
+    def result(self):
+        return {
+            "status": self.status,
+            "lines": self.lines,
+            "counts": dict(self.counts),
+            "matches": list(self.matches)
+        }
+
+
+def classify_file(path, max_matches=MAX_MATCHES):
+    """Classifies a log file in one streaming pass; a missing file is a FAIL."""
+    classifier = LogClassifier(max_matches)
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for piece in iter(lambda: f.readline(MAX_LINE_CHARS), ""):
+                classifier.feed(piece)
+    except FileNotFoundError:
+        return {"status": "FAIL", "lines": 0, "counts": {}, "matches": [], "error": "log file not found"}
+    return classifier.result()
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify test logs as PASS/FAIL in one pass.")
+    parser.add_argument("logs", nargs="+", help="log files to classify")
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    parser.add_argument("--max-matches", type=int, default=MAX_MATCHES, help="matches kept per log")
+    args = parser.parse_args(argv)
+
+    results = {path: classify_file(path, args.max_matches) for path in args.logs}
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        for path, result in results.items():
+            print(f"{'✅' if result['status'] == 'PASS' else '❌'} {result['status']} {path} ({result['lines']} lines)")
+            for m in result["matches"][:5]:
+                print(f"   L{m['line']} [{m['pattern']}] {m['text']}")
+            if result.get("error"):
+                print(f"   {result['error']}")
+    return 0 if all(r["status"] == "PASS" for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
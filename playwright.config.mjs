@@ -1,6 +1,7 @@
 // @ts-check
 import { defineConfig, devices } from '@playwright/test';
 import dotenv from 'dotenv';
+import fs from 'fs';
 import path from 'path';
 import { fileURLToPath } from 'url';
 
@@ -11,6 +12,11 @@ const __dirname = path.dirname(__filename);
 // Load environment variables from .env file
 dotenv.config({ path: path.resolve(__dirname, '.env') });
 
+// Logged-in storage state saved by the runner's login-once stage (see utils/auth.js)
+const storageState = process.env.STORAGE_STATE && fs.existsSync(process.env.STORAGE_STATE)
+  ? process.env.STORAGE_STATE
+  : undefined;
+
 /**
  * @see https://playwright.dev/docs/test-configuration
  */
@@ -33,6 +39,12 @@ export default defineConfig({
     // Otherwise fallback to dev.
     baseURL: process.env.BASE_URL || 'https://dev-spriced-cdbu.alpha.simadvisory.com/',
 
+    /* Start every context already signed in when the runner provides a storage state. */
+    storageState,
+
+    /* Headless by default; the runner passes --headed or PLAYWRIGHT_HEADED=1 for debugging. */
+    headless: process.env.PLAYWRIGHT_HEADED !== '1',
+
     /* Collect trace when retrying the failed test. */
     trace: 'on-first-retry',
   },
@@ -0,0 +1,256 @@
+// scripts/markup-factor-check.js
+//
+// Checks that the List Pricing "Markup Factor for Local Currency List Price"
+// matches the Markup entity's CM markup factor for one or more LP/Markup pairs,
+// all inside one authenticated browser session.
+//
+// Inputs (JSON on stdin when called with "-", otherwise environment variables):
+//   pairs          [{ "lpCode": "0110-3825", "muCode": "..." }]   MARKUP_PAIRS (JSON) or DYNAMIC_LP_CODE + DYNAMIC_MU_CODE
+//   uiUrl          https://dev-spriced-cdbu.alpha.simadvisory.com/   UI_URL
+//   authBaseUrl    https://auth.alpha.simadvisory.com                AUTH_BASE_URL
+//   authRealm      D_SPRICED                                         AUTH_REALM
+//   authClientId   CHN_D_SPRICED_Client                              AUTH_CLIENT_ID
+//   tolerance      0.001                                             MARKUP_TOLERANCE
+//   compareFuture  true  (also accept a match on Future CM factor)   MARKUP_COMPARE_FUTURE ("0" / "1")
+// Browser is headless unless PLAYWRIGHT_HEADED=1.
+//
+// Usage:
+//   echo '{"pairs":[{"lpCode":"0110-3825","muCode":"MU-1"}]}' | node scripts/markup-factor-check.js -
+//   DYNAMIC_LP_CODE=0110-3825 DYNAMIC_MU_CODE=MU-1 node scripts/markup-factor-check.js
+//
+// Exits 1 if any pair fails.
+const { chromium, expect } = require('playwright/test');
+const { activeStorageState, buildAuthUrl, loginIfNeeded } = require('../utils/auth');
+const { waitForGridLoaded } = require('../utils/waits');
+const { phase } = require('../utils/timing');
+
+function envPairs() {
+    if (process.env.MARKUP_PAIRS) {
+        return JSON.parse(process.env.MARKUP_PAIRS);
+    }
+    if (process.env.DYNAMIC_LP_CODE && process.env.DYNAMIC_MU_CODE) {
+        return [{ lpCode: process.env.DYNAMIC_LP_CODE, muCode: process.env.DYNAMIC_MU_CODE }];
+    }
+    return [];
+}
+
+function loadOptions(overrides = {}) {
+    const options = {
+        pairs: envPairs(),
+        uiUrl: process.env.UI_URL || 'https://dev-spriced-cdbu.alpha.simadvisory.com/',
+        authBaseUrl: process.env.AUTH_BASE_URL || 'https://auth.alpha.simadvisory.com',
+        authRealm: process.env.AUTH_REALM || 'D_SPRICED',
+        authClientId: process.env.AUTH_CLIENT_ID || 'CHN_D_SPRICED_Client',
+        tolerance: parseFloat(process.env.MARKUP_TOLERANCE || '0.001'),
+        compareFuture: process.env.MARKUP_COMPARE_FUTURE !== '0',
+        ...overrides
+    };
+    if (!options.uiUrl.endsWith('/')) options.uiUrl += '/';
+    return options;
+}
+
+async function readStdinJson() {
+    let data = '';
+    for await (const chunk of process.stdin) data += chunk;
+    return data.trim() ? JSON.parse(data) : {};
+}
+
+function parseFactor(raw) {
+    return raw ? parseFloat(raw.replace(/,/g, '').trim()) : 0;
+}
+
+async function readFactor(page, label) {
+    const markupLabel = page.locator('mat-label', { hasText: label }).first();
+    // Assuming structure: <sp-numeric> <mat-form-field> <label>...</label> <input>... </mat-form-field> </sp-numeric>
+    const input = page.locator('sp-numeric').filter({ has: markupLabel }).locator('input').first();
+    await input.waitFor({ state: 'visible', timeout: 30000 });
+    const raw = await input.inputValue();
+    console.log(`   Raw ${label}: "${raw}"`);
+    return parseFactor(raw);
+}
+
+async function login(page, options) {
+    const authUrl = buildAuthUrl({
+        authBaseUrl: options.authBaseUrl,
+        authRealm: options.authRealm,
+        authClientId: options.authClientId,
+        redirectUri: options.uiUrl
+    });
+
+    console.log(`🚀 Navigating to Login: ${authUrl}`);
+    await page.goto(authUrl);
+
+    // Skipped when the runner's saved session (STORAGE_STATE) is still valid
+    if (await loginIfNeeded(page)) {
+        console.log('✅ Login submitted.');
+    }
+    await page.waitForLoadState('networkidle');
+}
+
+// Filters the List Pricing grid by part number and returns the LP markup factor
+async function readListPricingFactor(page, lpCode) {
+    console.log('🔍 Applying filters...');
+    await page.getByRole('button', { name: 'Filter', exact: true }).click();
+    await page.getByRole('button', { name: 'Rule', exact: true }).click();
+    await page.getByRole('combobox', { name: 'Code' }).locator('path').click();
+    await page.getByRole('option', { name: 'Part Number', exact: true }).locator('span').click();
+
+    // Input ids (#mat-input-N) shift once dialogs have been opened before, so locate by dialog instead
+    const ruleInput = page.locator('mat-dialog-container input.mat-mdc-input-element').last();
+    await ruleInput.waitFor({ state: 'visible', timeout: 90000 });
+    await ruleInput.click();
+    await page.getByRole('button', { name: 'selectItem' }).click();
+    await page.getByRole('button', { name: 'Add Filter' }).click();
+
+    const picker = page.locator('mat-dialog-container').last();
+    await picker.getByRole('button', { name: 'Rule', exact: true }).click();
+    const pickerInput = picker.locator('input.mat-mdc-input-element').last();
+    await pickerInput.click();
+    console.log(`✏️ Filling List Pricing Code: ${lpCode}`);
+    await pickerInput.fill(lpCode);
+    await picker.getByRole('button', { name: 'Apply' }).click();
+
+    await page.getByText(lpCode).click();
+    await page.getByRole('button', { name: 'Submit' }).click();
+    await page.getByRole('button', { name: 'Apply' }).click();
+    console.log('✅ Filter applied.');
+
+    console.log('📥 Extracting LP Markup Factor...');
+    // Expand the accordion to see details (usually the first row detail)
+    const lpRow = page.locator('datatable-body-row').nth(2);
+    await lpRow.click();
+    await expect(lpRow).toBeVisible({ timeout: 5000 });
+    return readFactor(page, 'Markup Factor for Local Currency List Price');
+}
+
+// Filters the Markup grid by markup code and returns its current/future CM factors
+async function readMarkupFactors(page, muCode, compareFuture) {
+    console.log('🔍 Filtering by Markup Code...');
+    await page.getByRole('button', { name: 'Filter', exact: true }).click();
+    await page.getByRole('button', { name: 'Rule', exact: true }).click();
+    const markupFilterInput = page.locator('mat-dialog-container input.mat-mdc-input-element').last();
+    await markupFilterInput.click();
+    console.log(`✏️ Filling Markup Code: ${muCode}`);
+    await markupFilterInput.fill(muCode);
+    await page.getByRole('button', { name: 'Apply' }).click();
+
+    // Wait for grid to load results, then click row to expand details
+    await page.waitForSelector('datatable-body-row', { timeout: 30000 });
+    await page.locator('datatable-body-row').first().click();
+
+    console.log('📥 Extracting CM Markup Factor...');
+    const current = await readFactor(page, 'Current CM Markup Factor');
+    const future = compareFuture ? await readFactor(page, 'Future CM Markup Factor') : undefined;
+    return { current, future };
+}
+
+async function runMarkupFactorCheck(overrides = {}) {
+    const options = loadOptions(overrides);
+    const { pairs, tolerance, compareFuture } = options;
+    if (!pairs || pairs.length === 0) {
+        console.error('❌ FAIL: No LP/Markup pairs were provided.');
+        return [];
+    }
+
+    // Headless unless the runner passes PLAYWRIGHT_HEADED=1
+    const browser = await chromium.launch({ headless: process.env.PLAYWRIGHT_HEADED !== '1' });
+    const report = [];
+    try {
+        const context = await browser.newContext({ storageState: activeStorageState() });
+        const page = await context.newPage();
+        console.log(`🚀 Browser launched. Validating ${pairs.length} LP/Markup pair(s) in one session.`);
+
+        // 🔐 Login (once for the whole batch)
+        await phase('login', () => login(page, options));
+
+        console.log('📂 Clicking "Data Explorer"...');
+        await page.getByText('Data Explorer').click();
+        await page.waitForLoadState('networkidle');
+
+        console.log('🧭 Navigating to List Pricing...');
+        await page.getByRole('combobox', { name: 'Part', timeout: 30000 }).locator('svg').click();
+        await page.getByRole('option', { name: 'List Pricing' }).locator('span').click();
+        await waitForGridLoaded(page);
+        const listPricingUrl = page.url();
+
+        // 🧩 Second page for markup comparison
+        console.log('🧩 Opening new page for Markup comparison...');
+        const page1 = await context.newPage();
+        console.log(`🌐 Navigating to ${options.uiUrl}spriced-data...`);
+        await page1.goto(`${options.uiUrl}spriced-data`);
+
+        console.log('🧭 Navigating to Markup...');
+        await page1.getByRole('combobox', { name: 'List Pricing' }).locator('svg').click();
+        await page1.getByText('006 Markup').click();
+        await page1.waitForLoadState('networkidle');
+        const markupUrl = page1.url();
+
+        for (const [i, pair] of pairs.entries()) {
+            console.log(`\n--- Pair ${i + 1}/${pairs.length}: LP ${pair.lpCode} | MU ${pair.muCode} ---`);
+            const result = { lpCode: pair.lpCode, muCode: pair.muCode };
+            try {
+                if (i > 0) {
+                    // Reload the already-open pages to clear the previous pair's filters
+                    await page.goto(listPricingUrl);
+                    await page.waitForLoadState('networkidle');
+                    await page1.goto(markupUrl);
+                    await page1.waitForLoadState('networkidle');
+                }
+
+                result.lpMarkup = await phase(`read LP ${pair.lpCode}`, () => readListPricingFactor(page, pair.lpCode));
+                console.log(`📊 Parsed LP Markup Factor: ${result.lpMarkup}`);
+
+                const cm = await phase(`read MU ${pair.muCode}`, () => readMarkupFactors(page1, pair.muCode, compareFuture));
+                result.currentCm = cm.current;
+                result.futureCm = cm.future;
+
+                const matchesCurrent = Math.abs(result.lpMarkup - cm.current) < tolerance;
+                const matchesFuture = compareFuture && Math.abs(result.lpMarkup - cm.future) < tolerance;
+                if (matchesCurrent || matchesFuture) {
+                    result.status = 'PASS';
+                    console.log(`✅ PASS: LP Markup matches ${matchesCurrent ? 'Current CM' : 'Future CM'} Markup.`);
+                } else {
+                    result.status = 'FAIL';
+                    console.error(`❌ FAIL: Mismatch! LP Markup: ${result.lpMarkup} vs Current CM Markup: ${cm.current}` +
+                        (compareFuture ? ` or Future CM Markup: ${cm.future}` : ''));
+                }
+            } catch (err) {
+                result.status = 'ERROR';
+                result.error = err.message.split('\n')[0];
+                console.error(`❌ ERROR: ${result.error}`);
+            }
+            report.push(result);
+        }
+    } finally {
+        await browser.close();
+    }
+
+    // 📋 Per-pair report
+    console.log('\n📋 Markup Factor Report');
+    console.table(report.map(r => ({
+        'LP Code': r.lpCode,
+        'MU Code': r.muCode,
+        'LP Markup': r.lpMarkup,
+        'Current CM': r.currentCm,
+        'Future CM': r.futureCm,
+        'Status': r.status
+    })));
+    return report;
+}
+
+module.exports = { runMarkupFactorCheck, loadOptions };
+
+if (require.main === module) {
+    (async () => {
+        const overrides = process.argv[2] === '-' ? await readStdinJson() : {};
+        const report = await runMarkupFactorCheck(overrides);
+        const failed = report.filter(r => r.status !== 'PASS');
+        console.log(`🏁 Test execution completed. ${report.length - failed.length} passed, ${failed.length} failed.`);
+        if (report.length === 0 || failed.length > 0) {
+            process.exit(1); // Fail the script
+        }
+    })().catch(err => {
+        console.error(`❌ Error: ${err.message}`);
+        process.exit(1);
+    });
+}
@@ -0,0 +1,49 @@
+// scripts/save-storage-state.js
+//
+// Login-once stage used by the runner: signs in to one environment and saves
+// the Playwright storage state so specs and scripts can skip the login form.
+// Does nothing if the existing file is still within its expiry.
+//
+// Inputs (environment variables):
+//   STORAGE_STATE    output file, e.g. .auth/cdbu_dev.json               [required]
+//   UI_URL           https://dev-spriced-cdbu.alpha.simadvisory.com/
+//   AUTH_BASE_URL    https://auth.alpha.simadvisory.com
+//   AUTH_REALM       D_SPRICED
+//   AUTH_CLIENT_ID   CHN_D_SPRICED_Client
+//   FORCE_LOGIN      "1" to ignore an unexpired file
+const { chromium } = require('playwright/test');
+const { isStorageStateFresh, saveStorageState } = require('../utils/auth');
+
+(async () => {
+    const file = process.env.STORAGE_STATE;
+    if (!file) {
+        console.error('❌ STORAGE_STATE is not set.');
+        process.exit(1);
+    }
+    if (process.env.FORCE_LOGIN !== '1' && isStorageStateFresh(file)) {
+        console.log(`🔓 Storage state still valid: ${file}`);
+        return;
+    }
+
+    let uiUrl = process.env.UI_URL || 'https://dev-spriced-cdbu.alpha.simadvisory.com/';
+    if (!uiUrl.endsWith('/')) uiUrl += '/';
+
+    const started = Date.now();
+    // Nothing to look at here, so the login stage always runs headless
+    const browser = await chromium.launch({ headless: true });
+    try {
+        await saveStorageState(browser, {
+            file,
+            uiUrl,
+            authBaseUrl: process.env.AUTH_BASE_URL || 'https://auth.alpha.simadvisory.com',
+            authRealm: process.env.AUTH_REALM || 'D_SPRICED',
+            authClientId: process.env.AUTH_CLIENT_ID || 'CHN_D_SPRICED_Client'
+        });
+    } finally {
+        await browser.close();
+    }
+    console.log(`✅ Logged in and saved storage state to ${file} in ${((Date.now() - started) / 1000).toFixed(1)}s`);
+})().catch(err => {
+    console.error(`❌ Login failed: ${err.message}`);
+    process.exit(1);
+});
@@ -1,14 +1,13 @@
 import subprocess
-import time
-import psycopg2
 import sys
-import socket
 import requests 
 import os
-import signal
 import logging
 import json
 
+import db_pool
+from timing import phase
+
 # ==========================================
 # LOGGING CONFIGURATION
 # ==========================================
@@ -21,12 +20,11 @@ logger = logging.getLogger(__name__)
 
 # IMPORT CENTRAL CONFIG
 try:
-    from env_config import CURRENT_CONFIG, LOCAL_DB_PORT, TEST_ENV_NAME
+    from env_config import CURRENT_CONFIG, TEST_ENV_NAME
     logger.info("✅ Imported config from env_config")
 except ImportError:
     logger.warning("⚠️ Could not import env_config. Using default fallback values.")
     ENV_MAP = {}
-    LOCAL_DB_PORT = 6001
     TEST_ENV_NAME = "DEV"
     CURRENT_CONFIG = {
         "SSH_HOST": "simw01",
@@ -55,86 +53,19 @@ else:
 REMOTE_DB_PORT = int(CURRENT_CONFIG.get("REMOTE_DB_PORT", 5432))
 BACKEND_PORT = 8880  
 
-DB_CONFIG = {
-    "dbname": CURRENT_CONFIG.get("DB_NAME", "china_dbu_dev"),
-    "user": CURRENT_CONFIG.get("DB_USER", "china_app"),
-    "password": CURRENT_CONFIG.get("DB_PASS", "admin@china_app"),
-    "host": "127.0.0.1",
-    "port": LOCAL_DB_PORT
-}
-
 logger.info(f"🔹 DB SSH Host: {DB_SSH_HOST}")
 logger.info(f"🔹 Curl SSH Host: {CURL_SSH_HOST}")
-logger.info(f"🔹 DB Config: {DB_CONFIG['dbname']} on port {LOCAL_DB_PORT}")
-
-def kill_process_on_port(port):
-    """Finds and kills any process listening on the specified local port."""
-    logger.info(f"🔍 Checking for processes on port {port}...")
-    try:
-        # Check for process using the port (Linux/Mac)
-        cmd = f"lsof -ti:{port}"
-        pid = subprocess.check_output(cmd, shell=True).decode().strip()
-        if pid:
-            logger.warning(f"⚠️ Port {port} is in use by PID {pid}. Killing it...")
-            os.kill(int(pid), signal.SIGKILL)
-            time.sleep(1) # Wait for release
-            logger.info(f"✅ Port {port} freed.")
-        else:
-            logger.info(f"✅ Port {port} is free.")
-    except subprocess.CalledProcessError:
-        logger.info(f"✅ Port {port} is free (no process found).")
-    except Exception as e:
-        logger.error(f"⚠️ Could not kill process on port {port}: {e}")
-
-def wait_for_port(port, timeout=10):
-    """Waits for a port to be open on localhost."""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            result = sock.connect_ex(('127.0.0.1', port))
-            if result == 0:
-                return True
-        time.sleep(0.5)
-    return False
+logger.info(f"🔹 DB Config: {CURRENT_CONFIG.get('DB_NAME', 'china_dbu_dev')} via pooled SSH tunnel")
 
 def start_ssh_tunnel():
-    logger.info(f"🚀 Launching SSH Tunnel to '{DB_SSH_HOST}' for Database Connection...")
-    
-    # 1. Ensure Port 6001 is free
-    kill_process_on_port(LOCAL_DB_PORT)
-    
-    # 2. Start Tunnel
-    # Only forwarding the DB port here via simw01 (for DEV)
-    # Removing -N so we can see output if it fails immediately, but typically -N is correct for forwarding
-    ssh_cmd = [
-        "ssh", "-v", "-N", 
-        "-L", f"{LOCAL_DB_PORT}:127.0.0.1:{REMOTE_DB_PORT}", 
-        DB_SSH_HOST
-    ]
-    logger.info(f"▶ Executing SSH Command: {' '.join(ssh_cmd)}")
-    
-    # Windows fix
-    creationflags = 0
-    if sys.platform == "win32":
-        creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
-
+    """Opens the pooled DB connection (and its shared tunnel) for this environment; returns the pool or None."""
+    logger.info(f"🚀 Acquiring SSH Tunnel to '{DB_SSH_HOST}' for Database Connection...")
     try:
-        tunnel_process = subprocess.Popen(ssh_cmd, creationflags=creationflags, stderr=subprocess.PIPE)
-        logger.info("⏳ Waiting 5 seconds for SSH tunnel to establish...")
-        
-        # Verify the port actually opened
-        if wait_for_port(LOCAL_DB_PORT):
-             logger.info(f"✅ SSH Tunnel established. Port {LOCAL_DB_PORT} is open.")
-        else:
-             logger.error(f"❌ SSH Tunnel failed to bind port {LOCAL_DB_PORT}. Check SSH logs.")
-             if tunnel_process.poll() is not None:
-                 _, stderr = tunnel_process.communicate()
-                 logger.error(f"SSH Error Output: {stderr.decode()}")
-             return None
-
-        return tunnel_process
+        pool = db_pool.get_pool(TEST_ENV_NAME)
+        logger.info("✅ SSH Tunnel ready. Connection pool is open.")
+        return pool
     except Exception as e:
-        logger.error(f"❌ Failed to start SSH tunnel process: {e}")
+        logger.error(f"❌ {e}")
         return None
 
 
@@ -142,10 +73,10 @@ def database_flow():
     conn = None
     cursor = None
     try:
-        logger.info(f"🚀 Connecting to DB on local port {LOCAL_DB_PORT}...")
-        conn = psycopg2.connect(**DB_CONFIG)
+        logger.info("🚀 Checking out pooled DB connection...")
+        conn = db_pool.getconn(TEST_ENV_NAME)
         cursor = conn.cursor()
-        logger.info(f"✅ Connected to database {DB_CONFIG['dbname']}")
+        logger.info(f"✅ Connected to database {CURRENT_CONFIG.get('DB_NAME', 'china_dbu_dev')}")
 
         select_query = """
         SELECT *
@@ -195,8 +126,8 @@ def database_flow():
 
     finally:
         if cursor: cursor.close()
-        if conn: conn.close()
-        logger.info("🔒 Closed DB connection")
+        if conn: db_pool.putconn(conn)
+        logger.info("🔒 Returned DB connection to pool")
 
 
 # ==========================================
@@ -437,7 +368,10 @@ def run_backend_workflow():
 def run_playwright_test():
     logger.info("🧭 Launching Playwright UI validation...")
     
-    command = "npx playwright test verify_outbound_date.spec.js --headed"
+    command = "npx playwright test verify_outbound_date.spec.js"
+    # Headless unless the runner (or the user) asks for a visible browser
+    if os.getenv("PLAYWRIGHT_HEADED") == "1":
+        command += " --headed"
     logger.info(f"▶ Executing: {command}")
     
     try:
@@ -461,11 +395,13 @@ if __name__ == "__main__":
     try:
         # 1. Check DB (uses DB_SSH_HOST / simw01)
         if tunnel:
-            database_flow()
+            with phase("db"):
+                database_flow()
             
             # 2. Trigger Workflow (uses CURL_SSH_HOST / dev-spriced)
             # This is independent of the local DB tunnel
-            backend_success = run_backend_workflow()
+            with phase("backend trigger"):
+                backend_success = run_backend_workflow()
         else:
             logger.error("🛑 Skipping steps due to Tunnel failure.")
             sys.exit(1)
@@ -473,17 +409,14 @@ if __name__ == "__main__":
         logger.error(f"❌ Unexpected error in main flow: {e}")
     finally:
         if tunnel:
-            logger.info("🛑 Shutting down SSH tunnel...")
-            tunnel.terminate()
-            try:
-                tunnel.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                tunnel.kill()
-            logger.info("🔒 SSH tunnel closed")
+            logger.info("🛑 Closing connection pool and SSH tunnel...")
+            db_pool.close_all()
+            logger.info("🔒 SSH tunnel released")
 
     # Only run Playwright if backend trigger was successful
     if backend_success:
-        run_playwright_test()
+        with phase("ui check"):
+            run_playwright_test()
     else:
         logger.info("⏭️ Skipping Playwright test due to previous failures.")
         sys.exit(1)
\ No newline at end of file
@@ -1,4 +1,7 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
+import { waitForGridLoaded } from '../utils/waits';
+import { readGridRow } from '../utils/grid';
 import path from 'path';
 import dotenv from 'dotenv';
 
@@ -69,20 +72,15 @@ test('Validate Pricing Report Logic vs Data Explorer', async ({ page }) => {
     // Dynamic Auth URL Construction
     // Redirect URI uses the BASE_URL (e.g. dev or qa root)
     const redirectUri = BASE_URL; 
-    const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-    const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
     // Construct the full URL
-    const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+    const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
     
     console.log(`🚀 Navigating to Login...`);
     console.log(`🔗 Auth Link: ${authUrl}`);
     
     await page.goto(authUrl);
     
-    await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy');
-    await page.getByRole('textbox', { name: 'Password' }).fill('qwerty');
-    await page.getByRole('button', { name: 'Sign In' }).click();
+    await loginIfNeeded(page);
     await page.waitForLoadState('networkidle');
 
     // ==========================================
@@ -116,7 +114,7 @@ test('Validate Pricing Report Logic vs Data Explorer', async ({ page }) => {
     
     await page.getByRole('button', { name: 'Apply' }).click();
     await page.waitForLoadState('networkidle');
-    await page.waitForTimeout(10000); // Wait for grid reload
+    await waitForGridLoaded(page);
     
     const chinaRow = page.locator('datatable-body-row').filter({ hasText: 'CHINA' }).first();
     
@@ -126,41 +124,36 @@ test('Validate Pricing Report Logic vs Data Explorer', async ({ page }) => {
     }
     console.log("✅ Found CHINA region.");
     
-    // Extract Data from Grid
-    const sourceData = {};
-    async function getSourceValue(headerName) {
-        const headers = page.locator('datatable-header-cell');
-        const count = await headers.count();
-        let index = -1;
-        for(let i=0; i<count; i++) {
-            const text = await headers.nth(i).textContent();
-            if(text.trim() === headerName) {
-                index = i;
-                break;
-            }
-        }
-        if (index === -1) return null;
-        
-        // Target the cell inside the identified chinaRow
-        return await chinaRow.locator('datatable-body-cell').nth(index).textContent();
-    }
+    // Extract Data from Grid (whole CHINA row in one read)
+    const sourceRow = await readGridRow(page, {
+        hasText: 'CHINA',
+        columns: [
+            'Part Number', 'Name', 'Item Group',
+            'Publish Local Currency List Price', 'Publish Local Currency LP Effective Date',
+            'Current Local Currency List Price', 'Current Local Currency LP Effective Date',
+            'Publish USD List Price', 'Publish USD LP Effective Date',
+            'Current USD List Price', 'Current USD LP Effectve Date'
+        ]
+    });
+    const getSourceValue = headerName => sourceRow[headerName] ?? '';
 
     // Capture Fields
-    sourceData.partNumber = (await getSourceValue('Part Number')).trim();
-    sourceData.name = (await getSourceValue('Name')).trim();
-    sourceData.itemGroup = (await getSourceValue('Item Group')).trim();
+    const sourceData = {};
+    sourceData.partNumber = getSourceValue('Part Number');
+    sourceData.name = getSourceValue('Name');
+    sourceData.itemGroup = getSourceValue('Item Group');
     
-    sourceData.publishLocalPrice = parseCurrency(await getSourceValue('Publish Local Currency List Price'));
-    sourceData.publishLocalEffDate = (await getSourceValue('Publish Local Currency LP Effective Date')).trim();
+    sourceData.publishLocalPrice = parseCurrency(getSourceValue('Publish Local Currency List Price'));
+    sourceData.publishLocalEffDate = getSourceValue('Publish Local Currency LP Effective Date');
     
-    sourceData.currentLocalPrice = parseCurrency(await getSourceValue('Current Local Currency List Price'));
-    sourceData.currentLocalEffDate = (await getSourceValue('Current Local Currency LP Effective Date')).trim();
+    sourceData.currentLocalPrice = parseCurrency(getSourceValue('Current Local Currency List Price'));
+    sourceData.currentLocalEffDate = getSourceValue('Current Local Currency LP Effective Date');
 
-    sourceData.publishUSDPrice = parseCurrency(await getSourceValue('Publish USD List Price'));
-    sourceData.publishUSDEffDate = (await getSourceValue('Publish USD LP Effective Date')).trim();
+    sourceData.publishUSDPrice = parseCurrency(getSourceValue('Publish USD List Price'));
+    sourceData.publishUSDEffDate = getSourceValue('Publish USD LP Effective Date');
 
-    sourceData.currentUSDPrice = parseCurrency(await getSourceValue('Current USD List Price'));
-    sourceData.currentUSDEffDate = (await getSourceValue('Current USD LP Effectve Date')).trim();
+    sourceData.currentUSDPrice = parseCurrency(getSourceValue('Current USD List Price'));
+    sourceData.currentUSDEffDate = getSourceValue('Current USD LP Effectve Date');
 
     console.log('✅ Source Data Extracted:', sourceData);
 
@@ -1,4 +1,5 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
 import path from 'path';
 import dotenv from 'dotenv';
 
@@ -26,19 +27,14 @@ test('validate Future Product Group rule', async ({ page }) => {
   // Dynamic Auth URL Construction - Using the working structure provided
   // Redirect URI uses the BASE_URL (e.g. dev or qa root)
   const redirectUri = BASE_URL; 
-  const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-  const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
   // Construct the full URL
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   console.log(`🚀 Navigating to Login...`);
   console.log(`🔗 Auth Link: ${authUrl}`);
 
   await page.goto(authUrl);
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy', { timeout: 60000 });
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty', { timeout: 60000 });
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page);
   await page.waitForLoadState('networkidle');
   await page.waitForSelector('text=Work with master data and', { timeout: 120000 });
 
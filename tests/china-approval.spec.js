@@ -1,4 +1,5 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
 import { regionsConfig } from './regionsConfig-approval.js';
 import path from 'path';
 import dotenv from 'dotenv';
@@ -33,27 +34,16 @@ test('test', async ({ browser}) =>
                 // Dynamic Auth URL Construction - Using the working structure provided
                 // Redirect URI uses the BASE_URL (e.g. dev or qa root)
                 const redirectUri = BASE_URL; 
-                const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-                const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
                 // Construct the full URL
-                const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+                const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
                 
                 console.log(`🚀 Navigating to Login...`);
                 console.log(`🔗 Auth Link: ${authUrl}`);
                 
                 await page.goto(authUrl);
 
-                await page.getByRole('textbox', { name: 'Username or email' }).click({
-                    modifiers: ['ControlOrMeta']
-                });
-                // FIX: Timeout increased
-                await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy', { timeout: 60000 });
-                await page.getByRole('textbox', { name: 'Password' }).click({
-                    modifiers: ['ControlOrMeta']
-                });
-                await page.getByRole('textbox', { name: 'Password' }).fill('qwerty', { timeout: 60000 });
-                await page.getByRole('button', { name: 'Sign In' }).click();
+                // Skipped when the runner's saved session (STORAGE_STATE) is still valid
+                await loginIfNeeded(page);
                 
                 // Wait for redirect to app
                 await page.waitForLoadState('networkidle');
@@ -71,9 +61,6 @@ test('test', async ({ browser}) =>
                 await page.locator('#cdk-accordion-child-0').getByText('Calculated Local Currency').click();
                 await page.locator('#mat-input-52').click();
 
-                // Wait for filter results to appear (add a delay or spinner check if needed)
-                await page.waitForTimeout(2000);
-
                 // ---------------- CALCULATED LOCAL CURRENCY ----------------
                 const calcLocalCurrency = page.locator('sp-numeric', { hasText: 'Calculated Local Currency List Price' });
                 await calcLocalCurrency.waitFor({ state: 'visible', timeout: 30000 });
@@ -101,8 +88,6 @@ test('test', async ({ browser}) =>
                 // ---------------- FUTURE USD LIST PRICE ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('Future USD List Price').click();
                 await page.locator('#mat-input-58').click();
-                await page.waitForTimeout(500);
-
                 const futureUsdNumeric = page.locator('sp-numeric', { hasText: 'Future USD List Price' });
                 await futureUsdNumeric.waitFor({ state: 'visible', timeout: 60000 });
                 const futureUsdValue = await futureUsdNumeric.locator('input').evaluate(input => input.value.replace(/,/g, '').trim());
@@ -112,8 +97,6 @@ test('test', async ({ browser}) =>
                 // ---------------- FUTURE LOCAL CURRENCY LIST PRICE ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('Future Local Currency List').click();
                 await page.locator('#mat-input-50').click();
-                await page.waitForTimeout(2000);
-
                 const futureLocalNumeric = page.locator('sp-numeric', { hasText: 'Future Local Currency List' });
                 await futureLocalNumeric.waitFor({ state: 'visible', timeout: 30000 });
                 const futureLocalValue = await futureLocalNumeric.locator('input').evaluate(input => input.value.replace(/,/g, '').trim());
@@ -123,8 +106,6 @@ test('test', async ({ browser}) =>
                 // ---------------- FUTURE LOCAL CURRENCY LP EFFECTIVE DATE ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('Future Local Currency LP').click();
                 await page.locator('#mat-input-51').click();
-                await page.waitForTimeout(2000);
-
                 const futureLocalDatePicker = page.locator('sp-date-picker', { hasText: 'Future Local Currency LP Effective Date' });
                 await futureLocalDatePicker.waitFor({ state: 'visible', timeout: 30000 });
                 const dateValue = await futureLocalDatePicker.locator('input').evaluate(input => input.value.trim());
@@ -133,8 +114,6 @@ test('test', async ({ browser}) =>
 
                 // ---------------- LP OVERRIDE FLAG ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('LP Override Flag').click();
-                await page.waitForTimeout(1000);
-
                 const lpOverrideSelect = page.locator('sp-lookup-select', { hasText: 'LP Override Flag' });
                 await lpOverrideSelect.waitFor({ state: 'visible', timeout: 60000 });
                 const selectedValue = await lpOverrideSelect.locator('.mat-mdc-select-value span').first().innerText();
@@ -225,8 +204,6 @@ test('test', async ({ browser}) =>
 
                 // ---------------- PRICING MANAGER APPROVAL ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('Pricing Manager Approval').click();
-                await page.waitForTimeout(500);
-
                 const approvalSelect = page.locator('sp-lookup-select', { hasText: 'Pricing Manager Approval Status' });
                 await approvalSelect.waitFor({ state: 'visible', timeout: 30000 });
 
@@ -261,14 +238,12 @@ test('test', async ({ browser}) =>
                 const lpPage = await lpContext.newPage();
 
                 // Dynamic Auth for Threshold Page
-                const authThresholdUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+                const authThresholdUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
 
                 // Go to the LP Threshold page
                 await lpPage.goto(authThresholdUrl);
 
-                await lpPage.getByRole('textbox', { name: 'Username or email' }).fill('moloy');
-                await lpPage.getByRole('textbox', { name: 'Password' }).fill('qwerty');
-                await lpPage.getByRole('button', { name: 'Sign In' }).click();
+                await loginIfNeeded(lpPage);
                 await lpPage.waitForLoadState('networkidle');
 
                 await lpPage.getByText('Data Explorer').click();
@@ -277,8 +252,6 @@ test('test', async ({ browser}) =>
 
                 // Expand the accordion if necessary
                 await lpPage.locator('div', { hasText: /^LP Overwrte Threshold Level 1$/ }).first().click();
-                await lpPage.waitForTimeout(1000); // let it expand
-
                 // Find the <input> that belongs to the label "LP Overwrte Threshold Level 1"
                 const lpThresholdInput = lpPage.locator('sp-numeric', { hasText: 'LP Overwrte Threshold Level 1' }).locator('input[type="text"]');
 
@@ -312,8 +285,6 @@ test('test', async ({ browser}) =>
 
                 // ---------------- LP OVERRIDE FLAG ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('LP Override Flag').click();
-                await page.waitForTimeout(1000);
-
                 const lpOverrideSelect1 = page.locator('sp-lookup-select', { hasText: 'LP Override Flag' });
                 await lpOverrideSelect1.waitFor({ state: 'visible', timeout: 60000 });
                 const selectedValue1 = await lpOverrideSelect1.locator('.mat-mdc-select-value span').first().innerText();
@@ -412,8 +383,6 @@ test('test', async ({ browser}) =>
                 // ---------------- FETCH LP THRESHOLD LEVEL 2 ----------------
 
                 await lpPage.locator('#cdk-accordion-child-0').getByText('LP Overwrte Threshold Level 2').click();
-                await lpPage.waitForTimeout(1000); // wait for accordion to expand
-
                 // Locate the input inside <sp-numeric> for Level 2
                 const lpThreshold2Input = lpPage.locator('sp-numeric', { hasText: 'LP Overwrte Threshold Level 2' }).locator('input[type="text"]');
 
@@ -451,8 +420,6 @@ test('test', async ({ browser}) =>
 
                 // ---------------- LP OVERRIDE FLAG ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('LP Override Flag').click();
-                await page.waitForTimeout(1000);
-
                 const lpOverrideSelect2 = page.locator('sp-lookup-select', { hasText: 'LP Override Flag' });
                 await lpOverrideSelect2.waitFor({ state: 'visible', timeout: 60000 });
                 const selectedValue2 = await lpOverrideSelect2.locator('.mat-mdc-select-value span').first().innerText();
@@ -549,8 +516,6 @@ test('test', async ({ browser}) =>
 
                 // ---------------- APPROVER 3 ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('Approver 3').click();
-                await page.waitForTimeout(500);
-
                 const approver3Select = page.locator('sp-lookup-select', { hasText: 'Approver 3' });
                 await approver3Select.waitFor({ state: 'visible', timeout: 30000 });
 
@@ -560,8 +525,6 @@ test('test', async ({ browser}) =>
 
                 // ---------------- APPROVER 4 ----------------
                 await page.locator('#cdk-accordion-child-0').getByText('Approver 4').click();
-                await page.waitForTimeout(500);
-
                 const approver4Select = page.locator('sp-lookup-select', { hasText: 'Approver 4' });
                 await approver4Select.waitFor({ state: 'visible', timeout: 30000 });
 
@@ -1,4 +1,8 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
+import { waitForGridLoaded, waitForNetworkQuiet, waitForValueChange } from '../utils/waits';
+import { readGridRow } from '../utils/grid';
+import { phase } from '../utils/timing';
 import express from 'express';
 import path from 'path';
 import dotenv from 'dotenv';
@@ -6,34 +10,12 @@ import { spawn } from 'child_process'; // Added missing import for spawn if used
 
 // Load environment variables
 dotenv.config({ path: path.resolve(__dirname, '../.env') });
-async function getPVCGridValue(page, columnHeader) {
-  // 1. Find column index by header text
-  const headers = page.locator('datatable-header-cell');
-  const headerCount = await headers.count();
-
-  let columnIndex = -1;
-
-  for (let i = 0; i < headerCount; i++) {
-    const text = (await headers.nth(i).innerText()).trim();
-    if (text === columnHeader) {
-      columnIndex = i;
-      break;
-    }
-  }
-
-  if (columnIndex === -1) {
-    throw new Error(`❌ Column not found: ${columnHeader}`);
-  }
-
-  // 2. Read value from first row using index
-  const row = page.locator('datatable-body-row').first();
-  await expect(row).toBeVisible({ timeout: 30000 });
-
-  const cell = row.locator('datatable-body-cell').nth(columnIndex);
-  await expect(cell).toBeVisible({ timeout: 30000 });
-
-  const value = (await cell.innerText())?.trim();
-  return value || null;
+// Reads the first grid row in one round trip and maps the wanted headers to keys
+async function getPVCGridValues(page, columnsByKey) {
+  const row = await readGridRow(page, { columns: Object.values(columnsByKey) });
+  return Object.fromEntries(
+    Object.entries(columnsByKey).map(([key, header]) => [key, row?.[header] ?? null])
+  );
 }
 
 
@@ -57,19 +39,14 @@ async function runPVCValidationFlow(page, context, BASE_URL) {
   // Ensure redirect URI matches what Keycloak expects
   const redirectUri = BASE_URL; 
   
-  const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-  const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
   // Construct the full URL
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   console.log(`🚀 Navigating to Login...`);
   console.log(`🔗 Auth Link: ${authUrl}`);
   await page.goto(authUrl);
   await page.waitForLoadState('networkidle');
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy', { timeout: 60000 });
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty', { timeout: 60000 });
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page);
   await page.waitForLoadState('networkidle');
   console.log('🚀 Starting PVC Validation Flow');
   
@@ -199,16 +176,16 @@ if (!normalizedAllowFlag.startsWith('Yes')) {
 
 console.log('✅ Allow Flag = Yes → continue PVC logic');
 
-const pvcAction = {
-  publishCode: await getPVCGridValue(pvcPage, 'Publish PVC Code'),
-  publishDate: await getPVCGridValue(pvcPage, 'Publish Effective Date'),
+const pvcAction = await getPVCGridValues(pvcPage, {
+  publishCode: 'Publish PVC Code',
+  publishDate: 'Publish Effective Date',
 
-  futureCode: await getPVCGridValue(pvcPage, 'Future PVC Code'),
-  futureDate: await getPVCGridValue(pvcPage, 'Future Effective Date'),
-  
-  effectiveCode: await getPVCGridValue(pvcPage, 'Effective PVC Code'),
-  effectiveDate: await getPVCGridValue(pvcPage, 'Effective Date')
-};
+  futureCode: 'Future PVC Code',
+  futureDate: 'Future Effective Date',
+
+  effectiveCode: 'Effective PVC Code',
+  effectiveDate: 'Effective Date'
+});
 
 console.log('📊 PVC Grid Snapshot:', pvcAction);
 
@@ -238,35 +215,50 @@ console.log('📊 PVC Grid Snapshot:', pvcAction);
     server.close();
   });
 
-console.log('⏳ Waiting for CHINA DBU sync...');
-await page.waitForTimeout(15000);
-
 // --- CHINA DBU PART ENTITY VALIDATION ---
 
 const chinaPage = await context.newPage();
-await chinaPage.goto(`${BASE_URL}spriced-data`, { waitUntil: 'networkidle' });
-
-// Select entity: Part
-await chinaPage.getByRole('combobox', { name: '007 Pricing Action' }).click();
-// Open entity dropdown
-await chinaPage.locator('#mat-option-5').getByText('Part').click();
-await chinaPage.waitForLoadState('networkidle');
-
-// Filter by NRP Part Code
-await chinaPage.getByRole('button', { name: 'Filter', exact: true }).click();
-await chinaPage.getByRole('button', { name: 'Rule', exact: true }).click();
-
-const chinaFilter = chinaPage.locator('mat-dialog-container input').last();
-await chinaFilter.fill('G6540602');
-await chinaPage.getByRole('button', { name: 'Apply' }).click();
-
-// Read values from GRID (Rule 5)
-const futurePVC = await getPVCGridValue(chinaPage, 'Future PVC');
-const futureDate = await getPVCGridValue(chinaPage, 'Future PVC Effective Date');
-const currentPVC = await getPVCGridValue(chinaPage, 'Current PVC');
-const currentDate = await getPVCGridValue(chinaPage, 'Current PVC Effective Date');
-const publishPVC = await getPVCGridValue(chinaPage, 'Publish PVC');
-const publishDate = await getPVCGridValue(chinaPage, 'Publish PVC Effective Date');
+
+// Opens Part filtered by the NRP Part Code and reads the PVC columns from the GRID (Rule 5)
+const readChinaSnapshot = async () => {
+  await chinaPage.goto(`${BASE_URL}spriced-data`, { waitUntil: 'networkidle' });
+
+  // Select entity: Part
+  await chinaPage.getByRole('combobox', { name: '007 Pricing Action' }).click();
+  // Open entity dropdown
+  await chinaPage.locator('#mat-option-5').getByText('Part').click();
+  await chinaPage.waitForLoadState('networkidle');
+
+  // Filter by NRP Part Code
+  await chinaPage.getByRole('button', { name: 'Filter', exact: true }).click();
+  await chinaPage.getByRole('button', { name: 'Rule', exact: true }).click();
+
+  const chinaFilter = chinaPage.locator('mat-dialog-container input').last();
+  await chinaFilter.fill('G6540602');
+  await chinaPage.getByRole('button', { name: 'Apply' }).click();
+  await waitForGridLoaded(chinaPage);
+
+  return getPVCGridValues(chinaPage, {
+    futurePVC: 'Future PVC',
+    futureDate: 'Future PVC Effective Date',
+    currentPVC: 'Current PVC',
+    currentDate: 'Current PVC Effective Date',
+    publishPVC: 'Publish PVC',
+    publishDate: 'Publish PVC Effective Date'
+  });
+};
+
+// Poll until the sync lands instead of sleeping a fixed 15s. A PVC that fails the
+// business rule never reaches Future PVC, so the timeout is not an error here.
+console.log('⏳ Waiting for CHINA DBU sync...');
+const {
+  futurePVC, futureDate, currentPVC, currentDate, publishPVC, publishDate
+} = await phase('china dbu sync', () => waitForValueChange(readChinaSnapshot, {
+  until: snap => snap.futurePVC === selectedPVC.code,
+  interval: 2000,
+  timeout: 15000,
+  throwOnTimeout: false
+}));
 
 console.log('📊 China DBU Part Snapshot:', {
   currentPVC,
@@ -306,11 +298,8 @@ test('UI + API + NRP tab validation', async ({ page, context }) => {
   // Ensure redirect URI matches what Keycloak expects
   const redirectUri = BASE_URL; 
   
-  const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-  const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
   // Construct the full URL
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   console.log(`🚀 Navigating to Login...`);
   console.log(`🔗 Auth Link: ${authUrl}`);
@@ -318,9 +307,7 @@ test('UI + API + NRP tab validation', async ({ page, context }) => {
   await page.goto(authUrl);
 
   // FIX: Increased timeout for login fields
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy', { timeout: 60000 });
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty', { timeout: 60000 });
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await phase('login', () => loginIfNeeded(page));
   await page.waitForLoadState('networkidle');
 
   // Navigate to Data Explorer if not redirected there automatically
@@ -351,10 +338,7 @@ test('UI + API + NRP tab validation', async ({ page, context }) => {
   await page1.goto(nrpBaseUrl);
   
   // If redirected to login, handle it
-  if (await page1.getByRole('textbox', { name: 'Username or email' }).isVisible()) {
-      await page1.getByRole('textbox', { name: 'Username or email' }).fill('moloy');
-      await page1.getByRole('textbox', { name: 'Password' }).fill('qwerty');
-      await page1.getByRole('button', { name: 'Sign In' }).click();
+  if (await loginIfNeeded(page1)) {
       await page1.waitForLoadState('networkidle');
   }
 
@@ -427,10 +411,8 @@ test('UI + API + NRP tab validation', async ({ page, context }) => {
 
     // Click Save
     const saveBtn = page1.getByRole('button', { name: 'Save', exact: true });
-    await saveBtn.click();
-
-    // Wait a bit to ensure the value is applied
-    await page1.waitForTimeout(2000);
+    // Click and wait for the save round-trip to finish
+    await waitForNetworkQuiet(page1, () => saveBtn.click());
 
     const selectedValue = await engineModelContainer.locator('.mat-mdc-select-value-text').textContent();
     const nrpTrimmedValue = selectedValue?.trim();
@@ -1,4 +1,5 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
 import { regionsConfig } from './config.js';
 import path from 'path';
 import dotenv from 'dotenv';
@@ -48,7 +49,8 @@ async function selectDropdownByLabel(page, label, optionText) {
   await trigger.click();
   const option = page.locator('cdk-overlay-container mat-option').filter({ hasText: optionText });
   await option.click();
-  await page.waitForTimeout(500);
+  // Option list closes once the selection is applied
+  await option.first().waitFor({ state: 'hidden' });
 }
 
 // Helper to get value from sp-numeric field by its label
@@ -145,20 +147,15 @@ test('test', async ({ page, context }) => {
   // Dynamic Auth URL Construction - Using the working structure provided
   // Redirect URI uses the BASE_URL (e.g. dev or qa root)
   const redirectUri = BASE_URL; 
-  const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-  const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
   // Construct the full URL
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   console.log(`🚀 Navigating to Login...`);
   console.log(`🔗 Auth Link: ${authUrl}`);
   
   await page.goto(authUrl);
 
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy');
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty');
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page);
 
   // Wait for navigation after login
   await page.waitForLoadState('networkidle');
@@ -658,10 +655,7 @@ for (let i = 0; i < headerCount; i++) {
 const actualCalculatedLocal = await getLocalCurrencyValue(page3, 'Calculated Local Currency List Price');
 const actualFutureLocal = await getLocalCurrencyValue(page3, 'Future Local Currency List Price');
 
-// After updating USD values
-await page3.waitForTimeout(2000); // small delay for backend recalculation
-
-// OR wait until the Local Currency field has a non-null value
+// After updating USD values, wait until the Local Currency field has a non-null value
 await page3.waitForFunction(
   async () => {
     const calcField = document.querySelector('sp-numeric input#mat-input-85'); // your field id
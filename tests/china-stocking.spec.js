@@ -1,4 +1,6 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
+import { waitForNetworkQuiet, waitForRowCountStable } from '../utils/waits';
 import { spawn } from 'child_process';
 import path from 'path';
 import dotenv from 'dotenv';
@@ -62,16 +64,11 @@ test('NRP Stocking Logic: Certification Level vs Suggested Segment', async ({ pa
   console.log(`🌐 Navigating to NRP: ${BASE_URL_NRP}`);
   
   const redirectUri = BASE_URL_NRP; 
-  const state = 'bb5f5119-2a40-4f03-8fa2-7dd5c7e72826'; 
-  const nonce = '167e7012-1733-4f3d-bde8-68493ad1c9aa'; 
-
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   await page.goto(authUrl);
   
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy', { timeout: 60000 });
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty', { timeout: 60000 });
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page);
   
   await page.getByText('Data Explorer').click();
   await page.waitForLoadState('networkidle');
@@ -118,12 +115,12 @@ test('NRP Stocking Logic: Certification Level vs Suggested Segment', async ({ pa
 
   // 1. Click the first placeholder (Column Selector)
   await dialog.locator('mat-select').first().click();
-  await page.waitForTimeout(500); // Wait for dropdown
+  await page.locator('mat-option').first().waitFor({ state: 'visible' }); // Wait for dropdown
 
   // 2. Search "Product BU"
   console.log('   Searching for column "Product BU"...');
   await page.keyboard.type('Product BU'); 
-  await page.waitForTimeout(1000); 
+  await waitForRowCountStable(page, { rowSelector: 'mat-option' });
 
   // 3. Select the second option (as per instruction) or exact match
   // We try to find the option. If "Product BU" search filtered the list, we pick from results.
@@ -204,8 +201,7 @@ test('NRP Stocking Logic: Certification Level vs Suggested Segment', async ({ pa
 
   // 6️⃣ SELECT ROW AND VALIDATE
   const targetRow = rows.nth(targetRowIndex);
-  await targetRow.click(); 
-  await page.waitForTimeout(1000); 
+  await waitForNetworkQuiet(page, () => targetRow.click());
 
   // Read Data
   const certCell = targetRow.locator('datatable-body-cell').nth(certColIndex);
@@ -1,4 +1,5 @@
 import { test, expect, request as playwrightRequest } from '@playwright/test';
+import { loginIfNeeded } from '../utils/auth';
 import express from 'express';
 import path from 'path';
 import dotenv from 'dotenv';
@@ -47,9 +48,7 @@ test('Future -> Current Country Factor transfer after scheduler run', async ({ p
   
   await page.goto(authUrl);
 
-  await page.getByRole('textbox', { name: 'Username or email' }).fill(username);
-  await page.getByRole('textbox', { name: 'Password' }).fill(password);
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page, { username, password });
   await page.waitForLoadState('networkidle');
   console.log('✅ Logged in successfully');
 
@@ -111,7 +110,7 @@ test('Future -> Current Country Factor transfer after scheduler run', async ({ p
 
   // -------- 7) Reload page --------
   await page.reload({ waitUntil: 'networkidle' });
-  await page.waitForTimeout(1000);
+  await futureNumericInput.waitFor({ state: 'visible' });
 
   // -------- 8) Validate Current = Future --------
   const futureValueAfter = await futureNumericInput.inputValue();
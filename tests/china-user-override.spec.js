@@ -1,4 +1,6 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
+import { waitForGridLoaded } from '../utils/waits';
 import path from 'path';
 import dotenv from 'dotenv';
 
@@ -25,11 +27,8 @@ test('Eligibility check and Future USD List Price calculation', async ({ page })
   // Dynamic Auth URL Construction - Using the working structure provided
   // Redirect URI uses the BASE_URL (e.g. dev or qa root)
   const redirectUri = BASE_URL; 
-  const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-  const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
   // Construct the full URL
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   console.log(`🚀 Navigating to Login...`);
   console.log(`🔗 Auth Link: ${authUrl}`);
@@ -37,9 +36,7 @@ test('Eligibility check and Future USD List Price calculation', async ({ page })
   await page.goto(authUrl);
 
   // FIX: Increased timeout for input fields
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy', { timeout: 60000 });
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty', { timeout: 60000 });
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page);
 
   // 3️⃣ Navigate to Data Explorer
   // Added: Click 'Data Explorer' similar to china-list-pricing.spec.js
@@ -55,7 +52,7 @@ test('Eligibility check and Future USD List Price calculation', async ({ page })
   await page.getByRole('button', { name: 'Rule', exact: true }).click();
   await page.locator('#mat-input-91').fill('TAIWAN-135957 20');
   await page.getByRole('button', { name: 'Apply' }).click();
-  await page.waitForTimeout(1000);
+  await waitForGridLoaded(page);
   // 4️⃣ Read all required fields
   // const lpFlag = await page.locator('sp-lookup-select', {
   //   has: page.locator('mat-label', { hasText: 'LP Override Flag' }),
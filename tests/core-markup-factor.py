@@ -1,14 +1,15 @@
-import psycopg2
 import subprocess
 import os
+import json
 import sys
-import time
-import socket
-import urllib.parse
+
+import db_pool
+from markup_pairs import fetch_markup_pairs, strip_region_prefix
+from timing import phase
 
 # IMPORT CENTRAL CONFIG
 try:
-    from env_config import CURRENT_CONFIG, LOCAL_DB_PORT
+    from env_config import CURRENT_CONFIG
 except ImportError:
     # Basic fallback if config is missing (useful for standalone debug)
     CURRENT_CONFIG = {
@@ -22,69 +23,14 @@ except ImportError:
         "AUTH_REALM": "D_SPRICED",
         "AUTH_CLIENT_ID": "CHN_D_SPRICED_Client"
     }
-    LOCAL_DB_PORT = 6001
 
 # ==========================================
 # CONFIGURATION
 # ==========================================
-SSH_HOST = CURRENT_CONFIG.get("SSH_HOST", "simw01")
-REMOTE_DB_PORT = int(CURRENT_CONFIG.get("REMOTE_DB_PORT", 5432))
-
-DB_CONFIG = {
-    "dbname": CURRENT_CONFIG.get("DB_NAME", "qa_spriced"),
-    "user": CURRENT_CONFIG.get("DB_USER", "china_app"),
-    "password": CURRENT_CONFIG.get("DB_PASS", "admin_china_app"),
-    "host": "127.0.0.1",
-    "port": LOCAL_DB_PORT
-}
-
-# ==========================================
-# SSH TUNNEL FUNCTIONS
-# ==========================================
-def start_ssh_tunnel():
-    """Starts a local SSH tunnel process."""
-    print(f"\n🚀 Launching SSH Tunnel to '{SSH_HOST}'...")
-    print(f"   (Forwarding Local {LOCAL_DB_PORT} -> Remote {REMOTE_DB_PORT})")
-
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    if sock.connect_ex(('127.0.0.1', LOCAL_DB_PORT)) == 0:
-        print(f"❌ Port {LOCAL_DB_PORT} already in use — Terminating.")
-        sock.close()
-        return None
-    sock.close()
-
-    ssh_cmd = ["ssh", "-N", "-L", f"{LOCAL_DB_PORT}:127.0.0.1:{REMOTE_DB_PORT}", SSH_HOST]
-    
-    # Windows specific logic for process groups
-    creationflags = 0
-    if sys.platform == "win32":
-        creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
-
-    proc = subprocess.Popen(ssh_cmd, creationflags=creationflags)
-
-    time.sleep(5)
-   
-    if proc.poll() is not None:
-        print("❌ SSH Tunnel failed to start. Check SSH credentials/keys.")
-        return None
-
-    print("✅ SSH Tunnel running successfully.")
-    return proc
-
-
-def stop_ssh_tunnel(proc):
-    """Terminates the SSH tunnel process."""
-    if proc:
-        try:
-            proc.terminate()
-            proc.wait(timeout=5)
-        except Exception as e:
-            print(f"⚠️ Error stopping tunnel: {e}")
-            try:
-                proc.kill()
-            except:
-                pass
-        print("\n🔌 SSH Tunnel terminated.")
+# Static Playwright module that performs the UI side of the check
+MARKUP_CHECK_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts", "markup-factor-check.js")
+# How many LP/Markup pairs to validate in one browser session
+MARKUP_PAIR_LIMIT = int(os.getenv("MARKUP_PAIR_LIMIT", 10))
 
 # ==============================
 # MAIN SCRIPT LOGIC
@@ -92,12 +38,13 @@ def stop_ssh_tunnel(proc):
 def main():
     connection = None
     cursor = None
-    tunnel_process = None
    
-    # 1. Start SSH Tunnel
-    tunnel_process = start_ssh_tunnel()
-    if not tunnel_process:
-        print("🛑 Script stopped because SSH tunnel could not be established.")
+    # 1. Open the pooled DB connection (its SSH tunnel is shared with the runner when it already holds one)
+    try:
+        db_pool.get_pool()
+    except Exception as e:
+        print(f"❌ {e}")
+        print("🛑 Script stopped because the database could not be reached.")
         sys.exit(1)
 
     try:
@@ -105,87 +52,27 @@ def main():
         # 🧩 Step 1: Connect to Database (via Tunnel)
         # ==============================
         try:
-            connection = psycopg2.connect(**DB_CONFIG)
+            connection = db_pool.getconn()
             cursor = connection.cursor()
-            print(f"✅ Connected to database {DB_CONFIG['dbname']} (via SSH tunnel)")
+            print(f"✅ Connected to database {CURRENT_CONFIG['DB_NAME']} (pooled, via SSH tunnel)")
 
-           # -------------------------------------------------------------------
-            # 🎯 NEW STEP: Get MULTIPLE Dynamic IDs from Mapping Table
             # -------------------------------------------------------------------
-            print("\n🔄 Querying list_pricing_markup_mapping for dynamic IDs (LIMIT 10)...")
-           
-            cursor.execute("""
-                    SELECT list_price_id, markup_id
-                    FROM china.list_pricing_markup_mapping
-                    LIMIT 10 offset 20;
-                    """)
-
-            mapping_results = cursor.fetchall() 
-           
-            if not mapping_results:
-                print("❌ FATAL: No rows found in china.list_pricing_markup_mapping. Cannot proceed.")
-                sys.exit(1)
-           
-            found_valid_pair = False
-            list_pricing_code = ""
-            markup_code = ""
-
-            for i, row in enumerate(mapping_results):
-                dynamic_list_pricing_id = row[0]
-                dynamic_markup_id = row[1]
-
-                print(f"\n--- Attempt {i + 1} with LP ID: {dynamic_list_pricing_id} | MU ID: {dynamic_markup_id} ---")
-
-                # --- 1. Fetch Markup Code ---
-                query_mu = "SELECT code FROM china.markup WHERE id = %s;"
-                cursor.execute(query_mu, (dynamic_markup_id,))
-                markup_result = cursor.fetchone()
-               
-                # --- 2. Fetch List Pricing Code ---
-                query_lp = "SELECT code FROM china.list_pricing WHERE id = %s;"
-                cursor.execute(query_lp, (dynamic_list_pricing_id,))
-                list_pricing_result = cursor.fetchone()
-
-                if markup_result and list_pricing_result:
-                    markup_code = markup_result[0]
-                    list_pricing_code = list_pricing_result[0]
-                    found_valid_pair = True
-                    print(f"✅ Success! Found valid pair:")
-                    print(f"   LP Code: {list_pricing_code}")
-                    print(f"   MU Code: {markup_code}")
-                    break 
-                else:
-                    if not markup_result:
-                        print(f"❌ Markup code not found for ID {dynamic_markup_id}.")
-                    if not list_pricing_result:
-                        print(f"❌ List Pricing code not found for ID {dynamic_list_pricing_id}.")
-                    print("🔄 Invalid pair. Trying next row...")
+            # 🎯 Get valid (LP code, MU code) pairs in a single joined query
+            # -------------------------------------------------------------------
+            print("\n🔄 Querying list_pricing_markup_mapping for valid LP/MU code pairs...")
+            with phase("db query"):
+                pairs = fetch_markup_pairs(cursor, limit=MARKUP_PAIR_LIMIT, offset=20)
 
-            if not found_valid_pair:
-                print("\n❌ FATAL: Reached end of 10 rows. No valid (LP + MU) code pair found.")
+            if not pairs:
+                print("❌ FATAL: No valid (LP + MU) code pair found in china.list_pricing_markup_mapping.")
                 sys.exit(1)
 
-            print(f"\n🏷️ Final list_pricing code: {list_pricing_code}")
-            print(f"🏷️ Final markup code: {markup_code}")
-
-            # -------------------------------------------------------------------
-            # 🎯 FIXED LOGIC: Remove only the prefix (e.g. "CHINA-")
-            # Example: "CHINA-0110-3825" -> "0110-3825"
-            # -------------------------------------------------------------------
-            list_pricing_code_numeric = "NOT_FOUND"
-            if list_pricing_code and list_pricing_code != "NOT_FOUND":
-                if '-' in list_pricing_code:
-                    # Split by first dash only, keep the rest
-                    parts = list_pricing_code.split('-', 1)
-                    if len(parts) > 1:
-                        # This keeps "0110-3825" intact
-                        list_pricing_code_numeric = parts[1]
-                    else:
-                        list_pricing_code_numeric = list_pricing_code 
-                else:
-                    list_pricing_code_numeric = list_pricing_code
-            
-            print(f"🏷️ Final list_pricing code (Cleaned): {list_pricing_code_numeric}")
+            print(f"✅ Success! Found {len(pairs)} valid pair(s):")
+            # Remove only the prefix (e.g. "CHINA-0110-3825" -> "0110-3825")
+            markup_pairs = []
+            for list_pricing_code, markup_code in pairs:
+                print(f"   LP Code: {list_pricing_code} (Cleaned: {strip_region_prefix(list_pricing_code)}) | MU Code: {markup_code}")
+                markup_pairs.append({"lpCode": strip_region_prefix(list_pricing_code), "muCode": markup_code})
 
         except Exception as e:
             print(f"❌ Database error: {e}", file=sys.stderr)
@@ -194,197 +81,41 @@ def main():
 
         finally:
             if cursor: cursor.close()
-            if connection: connection.close()
-            print("🔒 Database connection closed.")
+            if connection: db_pool.putconn(connection)
+            print("🔒 Database connection returned to pool.")
 
         # ==============================
         # 🧩 Step 2: Run Playwright Test
         # ==============================
         
-        # Prepare environment variables for the Playwright script
-        env_vars = os.environ.copy()
-        env_vars["DYNAMIC_LP_CODE"] = str(list_pricing_code_numeric)
-        env_vars["DYNAMIC_MU_CODE"] = str(markup_code)
-        
-        # Get Config for URL Construction
-        ui_url = CURRENT_CONFIG.get("UI_URL", "https://dev-spriced-cdbu.alpha.simadvisory.com/")
-        auth_base = CURRENT_CONFIG.get("AUTH_BASE_URL", "https://auth.alpha.simadvisory.com")
-        auth_realm = CURRENT_CONFIG.get("AUTH_REALM", "D_SPRICED")
-        auth_client = CURRENT_CONFIG.get("AUTH_CLIENT_ID", "CHN_D_SPRICED_Client")
-        
-        # Construct dynamic Auth URL parameters
-        redirect_uri = ui_url
-        state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82' 
-        nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e' 
-
-        # Note: We pass these as strings to the JS template
-        
-        js_code = f"""const {{ chromium, expect }} = require('playwright/test'); // Import expect
-
-(async () => {{
-    const browser = await chromium.launch({{ headless: false }});
-    const context = await browser.newContext();
-    const page = await context.newPage();
-    console.log('🚀 Browser launched.');
-
-    // Dynamic Auth URL Construction
-    const authBase = '{auth_base}';
-    const authRealm = '{auth_realm}';
-    const authClient = '{auth_client}';
-    const redirectUri = '{redirect_uri}';
-    const state = '{state}';
-    const nonce = '{nonce}';
-    
-    const authUrl = `${{authBase}}/realms/${{authRealm}}/protocol/openid-connect/auth?client_id=${{authClient}}&redirect_uri=${{encodeURIComponent(redirectUri)}}&state=${{state}}&response_mode=fragment&response_type=code&scope=openid&nonce=${{nonce}}`;
-
-    console.log(`🚀 Navigating to Login: ${{authUrl}}`);
-    await page.goto(authUrl);
-
-    // 🔐 Login
-    console.log('🔐 Performing login...');
-    await page.getByRole('textbox', {{ name: 'Username or email' }}).fill('moloy');
-    await page.getByRole('textbox', {{ name: 'Password' }}).fill('qwerty');
-    await page.getByRole('button', {{ name: 'Sign In' }}).click();
-    console.log('✅ Login submitted.');
-    
-    await page.waitForLoadState('networkidle');
-
-    // 🆕 Data Explorer Click
-    console.log('📂 Clicking "Data Explorer"...');
-    await page.getByText('Data Explorer').click();
-    await page.waitForLoadState('networkidle');
-
-    // 🧭 Navigate to List Pricing
-    console.log('🧭 Navigating to List Pricing...');
-    await page.getByRole('combobox', {{ name: 'Part' ,timeout: 30000}}).locator('svg').click();
-    await page.getByRole('option', {{ name: 'List Pricing' }}).locator('span').click();
-    await page.waitForTimeout(5000);
-    
-    console.log('🔍 Applying filters...');
-    await page.getByRole('button', {{ name: 'Filter', exact: true }}).click();
-    await page.getByRole('button', {{ name: 'Rule', exact: true }}).click();
-    await page.getByRole('combobox', {{ name: 'Code' }}).locator('path').click();
-    await page.getByRole('option', {{ name: 'Part Number', exact: true }}).locator('span').click();
-    
-    await page.locator('#mat-input-93').waitFor({{ state: 'visible', timeout: 90000 }});
-    await page.locator('#mat-input-93').click();
-    await page.getByRole('button', {{ name: 'selectItem' }}).click();
-    await page.getByRole('button', {{ name: 'Add Filter' }}).click();
-
-    await page.locator('#mat-mdc-dialog-2').getByRole('button', {{ name: 'Rule', exact: true }}).click();
-    await page.locator('#mat-input-94').click();
-    console.log(`✏️ Filling List Pricing Code: {list_pricing_code_numeric}`);
-    await page.locator('#mat-input-94').fill('{list_pricing_code_numeric}');
-    await page.locator('#mat-mdc-dialog-2').getByRole('button', {{ name: 'Apply' }}).click();
-    
-    await page.getByText('{list_pricing_code_numeric}').click();
-    await page.getByRole('button', {{ name: 'Submit' }}).click();
-    await page.getByRole('button', {{ name: 'Apply' }}).click();
-    console.log('✅ Filter applied.');
-    
-    // NEW: Extract "Markup Factor for Local Currency List Price"
-    console.log('📥 Extracting LP Markup Factor...');
-    
-    // Expand the accordion to see details (usually the first row detail)
-    const lpRow = page.locator('datatable-body-row').nth(2);
-    await lpRow.click(); // Click row to expand details if needed
-    await expect(lpRow).toBeVisible(    {{ timeout: 5000 }});
-    // Refined Locator: Find the label first, then the input next to it or under it
-    // The previous locator might have failed if multiple numeric fields existed.
-    // We target the input specifically associated with the label.
-    
-    const lpMarkupLabel = page.locator('mat-label', {{ hasText: 'Markup Factor for Local Currency List Price' }}).first();
-    // Locate the input that is a sibling or descendant relative to the label's container
-    // Assuming structure: <sp-numeric> <mat-form-field> <label>...</label> <input>... </mat-form-field> </sp-numeric>
-    const lpMarkupFactorInput = page.locator('sp-numeric').filter({{ has: lpMarkupLabel }}).locator('input').first();
-    
-    await lpMarkupFactorInput.waitFor({{ state: 'visible', timeout: 30000 }});
-    let lpMarkupValue = await lpMarkupFactorInput.inputValue();
-    console.log(`Raw LP Value: "${{lpMarkupValue}}"`);
-    lpMarkupValue = lpMarkupValue ? parseFloat(lpMarkupValue.replace(/,/g, '').trim()) : 0;
-    console.log(`📊 Parsed LP Markup Factor: ${{lpMarkupValue}}`);
-
-
-    // 🧩 Open new page for markup comparison
-    console.log('🧩 Opening new page for Markup comparison...');
-    const page1 = await context.newPage();
-    console.log(`🌐 Navigating to ${{'{ui_url}'}}spriced-data...`);
-    await page1.goto('{ui_url}spriced-data');
-    
-    console.log('🧭 Navigating to Markup...');
-    await page1.getByRole('combobox', {{ name: 'List Pricing' }}).locator('svg').click();
-    await page1.getByText('006 Markup').click();
-    
-    console.log('🔍 Filtering by Markup Code...');
-    await page1.getByRole('button', {{ name: 'Filter', exact: true }}).click();
-    await page1.getByRole('button', {{ name: 'Rule', exact: true }}).click();
-    const markupFilterInput = page1.locator('mat-dialog-container input.mat-mdc-input-element').last();
-    await markupFilterInput.click();
-    console.log(`✏️ Filling Markup Code: {markup_code}`);
-    await markupFilterInput.fill('{markup_code}');
-    await page1.getByRole('button', {{ name: 'Apply' }}).click();
-    
-    // Wait for grid to load results
-    await page1.waitForSelector('datatable-body-row', {{ timeout: 30000 }});
-    // Click row to expand details
-    await page1.locator('datatable-body-row').first().click();
-
-    // NEW: Extract "Current CM Markup Factor"
-    console.log('📥 Extracting Current CM Markup Factor...');
-    const cmMarkupLabel = page1.locator('mat-label', {{ hasText: 'Current CM Markup Factor' }}).first();
-    const cmMarkupFactorInput = page1.locator('sp-numeric').filter({{ has: cmMarkupLabel }}).locator('input').first();
-    
-    await cmMarkupFactorInput.waitFor({{ state: 'visible', timeout: 30000 }});
-    let cmMarkupValue = await cmMarkupFactorInput.inputValue();
-    console.log(`   Raw CM Value: "${{cmMarkupValue}}"`);
-    cmMarkupValue = cmMarkupValue ? parseFloat(cmMarkupValue.replace(/,/g, '').trim()) : 0;
-    console.log(`📊 Parsed Current CM Markup Factor: ${{cmMarkupValue}}`);
-    
-    //NEW: Extract "Future CM Markup Factor"
-    console.log('📥 Extracting Future CM Markup Factor...');
-    const futurecmMarkupLabel = page1.locator('mat-label', {{ hasText: 'Future CM Markup Factor' }}).first();
-    const futurecmMarkupFactorInput = page1.locator('sp-numeric').filter({{ has: futurecmMarkupLabel }}).locator('input').first();
-    
-    await futurecmMarkupFactorInput.waitFor({{ state: 'visible', timeout: 30000 }});
-    let futurecmMarkupValue = await futurecmMarkupFactorInput.inputValue();
-    console.log(`   Raw CM Value: "${{futurecmMarkupValue}}"`);
-    futurecmMarkupValue = futurecmMarkupValue ? parseFloat(futurecmMarkupValue.replace(/,/g, '').trim()) : 0;
-    console.log(`📊 Parsed Future CM Markup Factor: ${{futurecmMarkupValue}}`);
-
-    // NEW: Compare Values
-    const TOLERANCE = 0.001;
-
-    const matchesCurrent =
-    Math.abs(lpMarkupValue - cmMarkupValue) < TOLERANCE;
-
-    const matchesFuture =
-    Math.abs(lpMarkupValue - futurecmMarkupValue) < TOLERANCE;
-
-    if (matchesCurrent || matchesFuture) {{
-        console.log(
-        `✅ PASS: LP Markup matches ` +
-        `${{matchesCurrent ? 'Current CM' : 'Future CM'}} Markup.`)
-    }} else {{
-        console.error(`❌ FAIL: Mismatch! LP Markup: ${{lpMarkupValue}} vs Current CM Markup: ${{cmMarkupValue}} or Future CM Markup: ${{futurecmMarkupValue}}`);
-        process.exit(1); // Fail the script
-    }}
-
-    await browser.close();
-    console.log('🏁 Test execution completed.');
-}})();
-"""
-        js_file = os.path.join(os.getcwd(), "core-temp.js")
-        with open(js_file, "w", encoding="utf-8") as f:
-            f.write(js_code)
-
-        print(f"\n🚀 Running generated Playwright script...\n")
-        subprocess.run(["node", js_file], env=env_vars)
+        # Inputs for the static markup-factor check, passed as JSON on stdin
+        payload = {
+            "pairs": markup_pairs,
+            "uiUrl": CURRENT_CONFIG.get("UI_URL", "https://dev-spriced-cdbu.alpha.simadvisory.com/"),
+            "authBaseUrl": CURRENT_CONFIG.get("AUTH_BASE_URL", "https://auth.alpha.simadvisory.com"),
+            "authRealm": CURRENT_CONFIG.get("AUTH_REALM", "D_SPRICED"),
+            "authClientId": CURRENT_CONFIG.get("AUTH_CLIENT_ID", "CHN_D_SPRICED_Client"),
+            "tolerance": 0.001,
+            "compareFuture": True
+        }
+
+        print(f"\n🚀 Running markup factor check for {len(markup_pairs)} pair(s)...\n")
+        with phase("ui check"):
+            result = subprocess.run(
+                ["node", MARKUP_CHECK_SCRIPT, "-"],
+                input=json.dumps(payload),
+                text=True,
+                encoding="utf-8",
+                env=os.environ.copy()
+            )
+        if result.returncode != 0:
+            sys.exit(result.returncode)
 
     except KeyboardInterrupt:
         print("\n⚠️ Script interrupted by user.")
    
     finally:
-        stop_ssh_tunnel(tunnel_process)
+        db_pool.close_all()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2 import pool as pg_pool
+
+import tunnel_manager
+
+# IMPORT CENTRAL CONFIG
+try:
+    from env_config import ENV_MAP, TEST_ENV_NAME
+except ImportError:
+    # Basic fallback if config is missing (useful for standalone debug)
+    TEST_ENV_NAME = os.getenv("TEST_ENV_NAME", "DEV").upper()
+    ENV_MAP = {
+        "DEV": {"DB_NAME": "dev_spriced", "DB_USER": "china_app", "DB_PASS": "admin_china_app"},
+        "QA": {"DB_NAME": "qa_spriced", "DB_USER": "china_app", "DB_PASS": "admin_china_app"}
+    }
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX_CONN", 5))
+CONNECT_TIMEOUT = 10
+# Connections idle longer than this get a SELECT 1 before being handed out
+HEALTH_CHECK_IDLE_SECONDS = 30
+
+
+class TimedCursor(psycopg2.extensions.cursor):
+    """Cursor that prints how long every query took."""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            statement = " ".join(str(query).split())[:80]
+            print(f"⏱️ Executed query in {duration_ms:.1f} ms (rows: {self.rowcount}): {statement}")
+
+
+# ==========================================
+# POOL REGISTRY (one pool per environment)
+# ==========================================
+_lock = threading.Lock()
+_pools = {}
+_owners = {}
+_last_used = {}
+
+
+def get_pool(env_name=None):
+    """Returns the environment's pool, opening its SSH tunnel on first use."""
+    env_name = (env_name or TEST_ENV_NAME).upper()
+    with _lock:
+        pool = _pools.get(env_name)
+        if pool is not None and not pool.closed:
+            return pool
+
+    # Tunnel start and first connect happen outside _lock: a slow SSH start
+    # must not hold up callers whose pool already exists
+    config = ENV_MAP.get(env_name, ENV_MAP["DEV"])
+    # The pool holds its tunnel reference until close_all()
+    port = tunnel_manager.acquire(env_name)
+    try:
+        pool = pg_pool.ThreadedConnectionPool(
+            POOL_MIN_CONN,
+            POOL_MAX_CONN,
+            dbname=config["DB_NAME"],
+            user=config["DB_USER"],
+            password=config["DB_PASS"],
+            host="127.0.0.1",
+            port=port,
+            connect_timeout=CONNECT_TIMEOUT,
+            cursor_factory=TimedCursor
+        )
+    except Exception:
+        tunnel_manager.release(env_name)
+        raise
+
+    with _lock:
+        existing = _pools.get(env_name)
+        if existing is None or existing.closed:
+            _pools[env_name] = pool
+            existing = None
+    if existing is not None:
+        # Another thread got there first: keep its pool, drop ours and our tunnel reference
+        pool.closeall()
+        tunnel_manager.release(env_name)
+        return existing
+    print(f"✅ Connection pool ready for {config['DB_NAME']} [{env_name}] (via SSH tunnel, port {port})")
+    return pool
+
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+    last_used = _last_used.get(id(conn))
+    # Brand-new connections and recently returned ones skip the round trip
+    if last_used is None or time.monotonic() - last_used < HEALTH_CHECK_IDLE_SECONDS:
+        return True
+    try:
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def getconn(env_name=None):
+    """Checks a healthy connection out of the environment's pool."""
+    env_name = (env_name or TEST_ENV_NAME).upper()
+    pool = get_pool(env_name)
+    conn = pool.getconn()
+    if not _is_healthy(conn):
+        print("⚠️ Discarding stale pooled connection.")
+        pool.putconn(conn, close=True)
+        conn = pool.getconn()
+    with _lock:
+        _owners[id(conn)] = env_name
+    return conn
+
+
+def putconn(conn):
+    """Returns a connection to its pool, rolling back any open transaction."""
+    with _lock:
+        env_name = _owners.pop(id(conn), None)
+        pool = _pools.get(env_name)
+    if pool is None or pool.closed:
+        conn.close()
+        return
+    if not conn.closed and conn.status != psycopg2.extensions.STATUS_READY:
+        conn.rollback()
+    if conn.closed:
+        _last_used.pop(id(conn), None)
+    else:
+        _last_used[id(conn)] = time.monotonic()
+    pool.putconn(conn, close=bool(conn.closed))
+
+
+@contextmanager
+def connection(env_name=None):
+    """Pooled connection; commits on success, rolls back on error."""
+    conn = getconn(env_name)
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        putconn(conn)
+
+
+def close_all():
+    """Closes every pool and releases the SSH tunnels they hold."""
+    with _lock:
+        pools = list(_pools.items())
+        _pools.clear()
+        _owners.clear()
+        _last_used.clear()
+    for env_name, pool in pools:
+        if not pool.closed:
+            pool.closeall()
+        tunnel_manager.release(env_name)
+
+
+atexit.register(close_all)
@@ -1,55 +1,12 @@
-import subprocess
-import time
-import psycopg2
 import sys
-import socket
 
+import db_pool
 
 # ==========================================
 # CONFIGURATION
 # ==========================================
-SSH_HOST = "simw01"
-LOCAL_PORT = 6001
-REMOTE_DB_PORT = 5432
-
-DB_CONFIG = {
-    "dbname": "dev_spriced",
-    "user": "china_app",
-    "password": "admin_china_app",
-    "host": "127.0.0.1",
-    "port": LOCAL_PORT
-}
-
-def start_ssh_tunnel():
-    print(f"\n🚀 Launching SSH Tunnel to '{SSH_HOST}'...")
-    print(f"   (Forwarding Local {LOCAL_PORT} -> Remote {REMOTE_DB_PORT})")
-
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    if sock.connect_ex(('127.0.0.1', LOCAL_PORT)) == 0:
-        print(f"❌ Port {LOCAL_PORT} already in use — change LOCAL_PORT\n")
-        return None
-    sock.close()
-
-    ssh_cmd = ["ssh", "-N", "-L", f"{LOCAL_PORT}:127.0.0.1:{REMOTE_DB_PORT}", SSH_HOST]
-    proc = subprocess.Popen(ssh_cmd)
-
-    time.sleep(5)
-    if proc.poll() is not None:
-        print("❌ SSH Tunnel failed to start.")
-        return None
-
-    print("✅ SSH Tunnel running successfully.")
-    return proc
-
-
-def stop_ssh_tunnel(proc):
-    if proc:
-        proc.terminate()
-        try:
-            proc.wait(timeout=2)
-        except subprocess.TimeoutExpired:
-            proc.kill()
-        print("\n🔌 SSH Tunnel terminated.")
+# Queries run against the TEST_ENV_NAME environment's database (DEV by default)
+TUNNEL_ENV = db_pool.TEST_ENV_NAME
 
 
 def print_table(cursor, rows):
@@ -86,10 +43,10 @@ def database_flow():
     connection = None
     cursor = None
     try:
-        print(f"\n🚀 Connecting to DB on local port {LOCAL_PORT}...")
-        connection = psycopg2.connect(**DB_CONFIG)
+        print("\n🚀 Checking out pooled DB connection...")
+        connection = db_pool.getconn(TUNNEL_ENV)
         cursor = connection.cursor()
-        print("✅ Connected to database china_dbu_dev")
+        print(f"✅ Connected to {TUNNEL_ENV} database {db_pool.ENV_MAP.get(TUNNEL_ENV, {}).get('DB_NAME')}")
 
         while True:
             # ---------------------------------------------------------
@@ -137,16 +94,18 @@ def database_flow():
 
     finally:
         if cursor: cursor.close()
-        if connection: connection.close()
-        print("🔒 Closed DB connection")
+        if connection: db_pool.putconn(connection)
+        print("🔒 Returned DB connection to pool")
 
 
 def main():
     # Force UTF-8 output for Windows terminals
     sys.stdout.reconfigure(encoding='utf-8')
 
-    proc = start_ssh_tunnel()
-    if not proc:
+    try:
+        db_pool.get_pool(TUNNEL_ENV)
+    except Exception as e:
+        print(f"❌ {e}")
         return
 
     try:
@@ -154,7 +113,7 @@ def main():
     except KeyboardInterrupt:
         print("\n⚠️ Interrupted by user.")
     finally:
-        stop_ssh_tunnel(proc)
+        db_pool.close_all()
 
 
 if __name__ == "__main__":
@@ -39,4 +39,6 @@ ENV_MAP = {
 CURRENT_CONFIG = ENV_MAP.get(TEST_ENV_NAME, ENV_MAP["DEV"])
 
 # Common Constants
-LOCAL_DB_PORT = 6001
\ No newline at end of file
+# Local end of the DB tunnel. 0 = let the tunnel manager pick a free
+# ephemeral port per environment (set LOCAL_DB_PORT to pin one).
+LOCAL_DB_PORT = int(os.getenv("LOCAL_DB_PORT", "0"))
\ No newline at end of file
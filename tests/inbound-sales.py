@@ -1,15 +1,14 @@
-import signal
-import socket
 import sys
 import os
 import time
 import subprocess
 import pandas as pd
-import psycopg2
 import paramiko
 from fastapi import FastAPI
 from pydantic import BaseModel
 
+import db_pool
+
 # =====================================
 # 1. CONFIGURATION & SETUP
 # =====================================
@@ -18,9 +17,8 @@ TEST_ENV_NAME = os.getenv("TEST_ENV_NAME", "DEV").upper()
 
 # Try importing central config, otherwise use fallbacks
 try:
-    from env_config import CURRENT_CONFIG, LOCAL_DB_PORT
+    from env_config import CURRENT_CONFIG
 except ImportError:
-    LOCAL_DB_PORT = 6001
     CURRENT_CONFIG = {
         "SSH_HOST": "simw01",
         "DB_NAME": "qa_spriced",
@@ -134,58 +132,16 @@ def run_backend_workflow(env):
 # =====================================
 # HELPER: Validation (With Auto-Tunnel)
 # =====================================
-def kill_process_on_port(port):
-    """Finds and kills any process listening on the specified local port."""
-    print(f"🔍 Checking for processes on port {port}...")
-    try:
-        cmd = f"lsof -ti:{port}"
-        pid = subprocess.check_output(cmd, shell=True).decode().strip()
-        if pid:
-            print(f"⚠️ Port {port} is in use by PID {pid}. Killing it...")
-            os.kill(int(pid), signal.SIGKILL)
-            time.sleep(1) 
-            print(f"✅ Port {port} freed.")
-    except subprocess.CalledProcessError:
-        print(f"✅ Port {port} is free.")
-    except Exception as e:
-        print(f"⚠️ Could not kill process on port {port}: {e}")
-
-def wait_for_port(port, timeout=10):
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            if sock.connect_ex(('127.0.0.1', port)) == 0:
-                return True
-        time.sleep(0.5)
-    return False
-
 def start_ssh_tunnel():
-    # SSH Host for Tunnel (Simw01 for DEV, qa-spriced for QA)
-    db_ssh_host = "simw01" if TEST_ENV_NAME == "DEV" else CURRENT_CONFIG.get("SSH_HOST", "qa-spriced")
-    remote_db_port = CURRENT_CONFIG.get("REMOTE_DB_PORT", 5432)
+    """Warms the pooled DB connection (and its shared tunnel); returns the pool or None.
 
-    print(f"🚀 Launching SSH Tunnel to '{db_ssh_host}'...")
-    
-    kill_process_on_port(LOCAL_DB_PORT)
-    
-    ssh_cmd = [
-        "ssh", "-N", 
-        "-L", f"{LOCAL_DB_PORT}:127.0.0.1:{remote_db_port}", 
-        db_ssh_host
-    ]
-    
+    The pool stays open between /run-automation calls, so later requests reuse
+    the same tunnel and connections instead of reconnecting.
+    """
     try:
-        tunnel_process = subprocess.Popen(ssh_cmd)
-        print("⏳ Waiting for SSH tunnel to establish...")
-        if wait_for_port(LOCAL_DB_PORT):
-             print(f"✅ SSH Tunnel established. Port {LOCAL_DB_PORT} is ready.")
-             return tunnel_process
-        else:
-             print(f"❌ SSH Tunnel failed to bind port {LOCAL_DB_PORT}.")
-             tunnel_process.terminate()
-             return None
+        return db_pool.get_pool(TEST_ENV_NAME)
     except Exception as e:
-        print(f"❌ Failed to start SSH tunnel process: {e}")
+        print(f"❌ {e}")
         return None
 
 def validate_csv_vs_db():
@@ -195,7 +151,6 @@ def validate_csv_vs_db():
     TARGET_PART_NUMBER = "0100-3399-04"
     FULL_CODE = f"{TARGET_COUNTRY}-{TARGET_PART_NUMBER}"
     
-    tunnel = None
     conn = None
 
     try:
@@ -216,19 +171,12 @@ def validate_csv_vs_db():
         print(f"📄 CSV Volume: {csv_volume}")
 
         # --- 2. START TUNNEL ---
-        tunnel = start_ssh_tunnel()
-        if not tunnel:
+        if not start_ssh_tunnel():
             return {"status": "fail", "error": "Could not establish SSH tunnel"}
 
         # --- 3. CONNECT TO DB ---
-        print(f"📊 Connecting to DB on localhost:{LOCAL_DB_PORT}...")
-        conn = psycopg2.connect(
-            host="127.0.0.1",
-            port=LOCAL_DB_PORT,
-            database=CURRENT_CONFIG["DB_NAME"],
-            user=CURRENT_CONFIG["DB_USER"],
-            password=CURRENT_CONFIG["DB_PASS"]
-        )
+        print("📊 Checking out pooled DB connection...")
+        conn = db_pool.getconn(TEST_ENV_NAME)
         
         # --- 4. RUN QUERY ---
         cur = conn.cursor()
@@ -255,10 +203,7 @@ def validate_csv_vs_db():
         return {"status": "fail", "error": str(e)}
 
     finally:
-        if conn: conn.close()
-        if tunnel:
-            print("🔌 Closing SSH Tunnel...")
-            tunnel.terminate()
+        if conn: db_pool.putconn(conn)
 
 # =====================================
 # API ENDPOINT (For Manual Trigger)
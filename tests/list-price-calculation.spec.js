@@ -1,4 +1,6 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
+import { waitForNetworkQuiet } from '../utils/waits';
 import { query } from '../utils/db'; // Assumes utils/db.js exists
 import { spawn } from 'child_process';
 import path from 'path';
@@ -52,6 +54,14 @@ async function waitForTunnel(port, timeout = 10000) {
 }
 
 async function startSSHTunnel() {
+  // The runner publishes its shared forward as DB_TUNNEL_PORT_<ENV> (tests/tunnel_manager.py)
+  // and points DB_PORT at it; a second ssh on that port would only collide with it
+  const envName = (process.env.TEST_ENV_NAME || 'DEV').toUpperCase();
+  const sharedPort = process.env[`DB_TUNNEL_PORT_${envName}`];
+  if (sharedPort) {
+    console.log(`🔗 Reusing shared SSH Tunnel on port ${sharedPort} [${envName}].`);
+    return;
+  }
   const localPort = process.env.DB_PORT || '6001';
   const sshTarget = process.env.SSH_USER ? `${process.env.SSH_USER}@${SSH_HOST}` : SSH_HOST;
   console.log(`🚀 Launching SSH Tunnel to '${SSH_HOST}'...`);
@@ -148,17 +158,12 @@ test('List Pricing Calculation', async ({ page, context }) => {
     console.log(`🌐 Application URL: ${BASE_URL}`);
     
     const redirectUri = BASE_URL; 
-    const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-    const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
-    const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+    const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
     
     console.log(`🚀 Navigating to Login...`);
     await page.goto(authUrl);
 
-    await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy');
-    await page.getByRole('textbox', { name: 'Password' }).fill('qwerty');
-    await page.getByRole('button', { name: 'Sign In' }).click();
+    await loginIfNeeded(page);
 
     await page.waitForLoadState('networkidle');
 
@@ -215,7 +220,8 @@ test('List Pricing Calculation', async ({ page, context }) => {
     await page1.waitForLoadState('networkidle');
 
     await page1.getByRole('combobox', { name: 'Markup' }).locator('svg').click();
-    await page1.getByText('sys Country').click();
+    // The factor inputs are filled by the requests this click fires
+    await waitForNetworkQuiet(page1, () => page1.getByText('sys Country').click());
 
 
     // Helper to extract factors
@@ -231,7 +237,6 @@ test('List Pricing Calculation', async ({ page, context }) => {
         }
         return { USD: 1, Local: 1 }; // Default safe values
     };
-await page.waitForTimeout();
     const chinaFactors = await extractFactor(page1, 'Current Country Factor USD', 'Current Country Factor Local');
     console.log("CHINA Factors:", chinaFactors);
 
@@ -0,0 +1,29 @@
+# ==========================================
+# LP / MARKUP PAIR DISCOVERY
+# ==========================================
+# One joined query replaces the old "fetch mapping rows, then look up each
+# markup and list pricing code by id" loop (2 round trips per row over the tunnel).
+PAIRS_QUERY = """
+    SELECT lp.code, mu.code
+    FROM china.list_pricing_markup_mapping m
+    JOIN china.list_pricing lp ON lp.id = m.list_price_id
+    JOIN china.markup mu ON mu.id = m.markup_id
+    WHERE lp.code IS NOT NULL
+      AND mu.code IS NOT NULL
+    LIMIT %s OFFSET %s;
+"""
+
+
+def fetch_markup_pairs(cursor, limit=1, offset=0):
+    """Returns up to `limit` valid (list_pricing_code, markup_code) pairs."""
+    cursor.execute(PAIRS_QUERY, (limit, offset))
+    return [(lp_code, mu_code) for lp_code, mu_code in cursor.fetchall()]
+
+
+def strip_region_prefix(code):
+    """Removes only the region prefix, e.g. "CHINA-0110-3825" -> "0110-3825"."""
+    if not code or code == "NOT_FOUND":
+        return "NOT_FOUND"
+    # Split by first dash only, keep the rest
+    parts = code.split('-', 1)
+    return parts[1] if len(parts) > 1 else code
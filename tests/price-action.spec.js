@@ -1,4 +1,6 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
+import { waitForGridLoaded } from '../utils/waits';
 import { regionsConfig } from './config.js';
 import path from 'path';
 import dotenv from 'dotenv';
@@ -42,7 +44,7 @@ async function extractFactors(p, country) {
     if (!(await testInput.isVisible())) {
         console.log(`   -> Expanding ${country} section...`);
         await countryHeader.click();
-        await p.waitForTimeout(1000); // Allow animation
+        await testInput.waitFor({ state: 'visible' }); // Allow animation
     } else {
         // Even if visible, sometimes clicking ensures the row is "active" for extraction
         // But if it's China (often top row), we might skip clicking if it looks open.
@@ -63,16 +65,12 @@ test('test', async ({ page, context }) => {
   // ----------------- LOGIN -----------------
   console.log(`🌐 Application URL: ${BASE_URL}`);
   const redirectUri = BASE_URL; 
-  const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-  const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   console.log(`🚀 Navigating to Login...`);
   await page.goto(authUrl);
 
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy');
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty');
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page);
   await page.waitForLoadState('networkidle');
 
   // ----------------- Navigate to Data Explorer -----------------
@@ -112,7 +110,7 @@ test('test', async ({ page, context }) => {
 
   await page1.getByRole('combobox', { name: 'Markup' }).locator('svg').click();
   await page1.getByText('sys Country').click();
-  await page1.waitForTimeout(2000); // Wait for grid
+  await waitForGridLoaded(page1);
 
   console.log("🔎 Extracting Factors...");
   const chinaFactors = await extractFactors(page1, 'CHINA');
@@ -175,7 +173,7 @@ test('test', async ({ page, context }) => {
         await page3.getByRole('combobox', { name: 'sys Exchange Rate' }).locator('path').click();
         await page3.getByRole('option', { name: 'List Pricing' }).locator('span').click();
         isListPricingSelected = true;  
-        await page3.waitForTimeout(2000);
+        await waitForGridLoaded(page3);
     }
 
     // Filter by productCode
@@ -193,7 +191,7 @@ test('test', async ({ page, context }) => {
         const isExpanded = await expansionHeader.getAttribute('aria-expanded');
         if (isExpanded === 'false') {
             await expansionHeader.click();
-            await page3.waitForTimeout(1000); 
+            await expect(expansionHeader).toHaveAttribute('aria-expanded', 'true');
         }
     }
 
@@ -1,4 +1,6 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
+import { waitForNetworkQuiet } from '../utils/waits';
 import { spawn } from 'child_process';
 import path from 'path';
 import dotenv from 'dotenv';
@@ -62,16 +64,11 @@ test('NRP Stocking Logic: Certification Level vs Suggested Segment', async ({ pa
   console.log(`🌐 Navigating to NRP: ${BASE_URL_NRP}`);
   
   const redirectUri = BASE_URL_NRP; 
-  const state = 'bb5f5119-2a40-4f03-8fa2-7dd5c7e72826'; 
-  const nonce = '167e7012-1733-4f3d-bde8-68493ad1c9aa'; 
-
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   await page.goto(authUrl);
 
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy', { timeout: 60000 });
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty', { timeout: 60000 });
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page);
   await page.getByText('Data Explorer').click();
   await page.waitForLoadState('networkidle');
 
@@ -175,8 +172,7 @@ test('NRP Stocking Logic: Certification Level vs Suggested Segment', async ({ pa
 
   // 6️⃣ SELECT ROW AND VALIDATE
   const targetRow = rows.nth(targetRowIndex);
-  await targetRow.click(); // Select/Expand row
-  await page.waitForTimeout(1000); 
+  await waitForNetworkQuiet(page, () => targetRow.click()); // Select/Expand row
 
   // Read Certification Level
   const certCell = targetRow.locator('datatable-body-cell').nth(certColIndex);
@@ -1,4 +1,6 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
+import { fixedSleep } from '../utils/waits';
 import { spawn } from 'child_process';
 import path from 'path';
 import dotenv from 'dotenv';
@@ -42,10 +44,7 @@ test('Future -> Current Country Factor transfer after scheduler run', async ({ p
   
   // Dynamic Auth URL Construction
   const redirectUri = BASE_URL; 
-  const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-  const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   console.log(`🚀 Navigating to Login...`);
   console.log(`🔗 Auth Link: ${authUrl}`);
@@ -53,9 +52,7 @@ test('Future -> Current Country Factor transfer after scheduler run', async ({ p
   await page.goto(authUrl);
 
   // FIX: Increased timeout for login fields
-  await page.getByRole('textbox', { name: 'Username or email' }).fill(username, { timeout: 60000 });
-  await page.getByRole('textbox', { name: 'Password' }).fill(password, { timeout: 60000 });
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page, { username, password });
   await page.waitForLoadState('networkidle');
   console.log('✅ Logged in successfully');
 
@@ -177,10 +174,9 @@ test('Future -> Current Country Factor transfer after scheduler run', async ({ p
 
   for (let attempt = 1; attempt <= 3; attempt++) {
       console.log(`🔄 Attempt ${attempt}/5: Waiting 10s then refreshing...`);
-      await page.waitForTimeout(10000); 
+      await fixedSleep(page, 10000, 'scheduler interval'); 
       
       await page.reload({ waitUntil: 'networkidle' });
-      await page.waitForTimeout(2000); // Allow UI to hydrate
 
       // Re-fetch elements after reload
       const futureInput = page.locator('sp-numeric').filter({ hasText: 'Future Country Factor USD' }).locator('input');
@@ -0,0 +1,51 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import history_store  # noqa: E402
+
+
+def _page_stats(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return (conn.execute('PRAGMA freelist_count').fetchone()[0],
+                conn.execute('PRAGMA page_count').fetchone()[0])
+    finally:
+        conn.close()
+
+
+def test_prune_returns_freed_pages(tmp_path):
+    db_path = str(tmp_path / "history.db")
+    history_store.init(db_path)
+    try:
+        tests = [{'file': f'spec-{i}.spec.js', 'status': 'FAIL', 'logFile': 'x' * 2000, 'exitCode': 1}
+                 for i in range(10)]
+        for _ in range(300):
+            history_store.save_execution("China Project", tests)
+        _, pages_before = _page_stats(db_path)
+
+        assert history_store.prune(keep_runs=10, keep_days=0, batch=50) == 290
+
+        freelist, pages_after = _page_stats(db_path)
+        assert freelist == 0
+        assert pages_after < pages_before / 2
+    finally:
+        history_store.close()
+
+
+def test_reclaim_returns_without_incremental_auto_vacuum(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "plain.db"), isolation_level=None)
+    try:
+        conn.execute('CREATE TABLE t (x TEXT)')
+        conn.executemany('INSERT INTO t VALUES (?)', [('x' * 2000,)] * 200)
+        conn.execute('DELETE FROM t')
+        assert conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+        assert conn.execute('PRAGMA freelist_count').fetchone()[0] > 0
+
+        history_store._reclaim_free_pages(conn)
+
+        assert conn.execute('PRAGMA freelist_count').fetchone()[0] > 0
+    finally:
+        conn.close()
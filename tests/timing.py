@@ -0,0 +1,22 @@
+import time
+from contextlib import contextmanager
+
+# ==========================================
+# RUNNER PHASE MARKERS
+# ==========================================
+# A phase prints one line, "⏱️ PHASE [db query] 120ms", which china-cdbu-test.py
+# collects per script and stores with the run history.
+
+
+def report_phase(name, ms):
+    print(f"⏱️ PHASE [{name}] {round(ms)}ms", flush=True)
+
+
+@contextmanager
+def phase(name):
+    """Times the block and reports it as phase `name` (also when it raises)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        report_phase(name, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,323 @@
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# IMPORT CENTRAL CONFIG
+try:
+    from env_config import ENV_MAP, LOCAL_DB_PORT, TEST_ENV_NAME
+except ImportError:
+    # Basic fallback if config is missing (useful for standalone debug)
+    TEST_ENV_NAME = os.getenv("TEST_ENV_NAME", "DEV").upper()
+    LOCAL_DB_PORT = int(os.getenv("LOCAL_DB_PORT", "0"))
+    ENV_MAP = {
+        "DEV": {"SSH_HOST": "simw01", "REMOTE_DB_PORT": 5432},
+        "QA": {"SSH_HOST": "simw01", "REMOTE_DB_PORT": 5432}
+    }
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+# Set by the test runner when it already holds a tunnel for an environment, as
+# DB_TUNNEL_PORT_<ENV> (see shared_port_var). Child scripts reuse that forward
+# instead of starting (or killing) their own.
+SHARED_TUNNEL_PORT_VAR = "DB_TUNNEL_PORT"
+# Total deadline for a new forward to answer a PostgreSQL handshake
+TUNNEL_START_TIMEOUT = 15
+# Readiness probe backoff: 50ms, 100ms, 200ms, ... capped at 1s
+PROBE_BACKOFF_INITIAL = 0.05
+PROBE_BACKOFF_MAX = 1.0
+# A freshly allocated port can be grabbed by someone else before ssh binds it
+PORT_BIND_ATTEMPTS = 3
+
+# PostgreSQL SSLRequest packet: length 8, request code 80877103
+PG_SSL_REQUEST = struct.pack("!ii", 8, 80877103)
+
+
+class TunnelError(RuntimeError):
+    """Raised when an SSH tunnel cannot be established or is not healthy."""
+
+
+class PortInUseError(TunnelError):
+    """Raised when ssh could not bind the requested local port."""
+
+
+def shared_port_var(env_name):
+    """Environment variable carrying the runner's forward for env_name, e.g. DB_TUNNEL_PORT_QA."""
+    return f"{SHARED_TUNNEL_PORT_VAR}_{env_name.upper()}"
+
+
+def allocate_local_port(host="127.0.0.1"):
+    """Asks the OS for a free ephemeral port on host."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def postgres_is_ready(port, host="127.0.0.1", timeout=1.0):
+    """Returns True if a PostgreSQL server answers an SSLRequest through host:port.
+
+    ssh binds the local port before the remote side is reachable, so an open
+    port alone does not mean the forward works; the server's one byte 'S'/'N'
+    reply does.
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout) as sock:
+            sock.settimeout(timeout)
+            sock.sendall(PG_SSL_REQUEST)
+            return sock.recv(1) in (b"S", b"N")
+    except OSError:
+        return False
+
+
+# ==========================================
+# SSH TUNNEL
+# ==========================================
+class SSHTunnel:
+    """A single `ssh -N -L` forward owned by this process."""
+
+    def __init__(self, env_name, ssh_host, local_port, remote_port):
+        self.env_name = env_name
+        self.ssh_host = ssh_host
+        self.local_port = local_port
+        self.remote_port = remote_port
+        self.proc = None
+        self._stderr = None
+
+    def start(self, timeout=TUNNEL_START_TIMEOUT):
+        print(f"\n🚀 Launching SSH Tunnel to '{self.ssh_host}' [{self.env_name}]...")
+        print(f"   (Forwarding Local {self.local_port} -> Remote {self.remote_port})")
+
+        ssh_cmd = [
+            "ssh", "-N",
+            "-o", "ExitOnForwardFailure=yes",
+            "-L", f"{self.local_port}:127.0.0.1:{self.remote_port}",
+            self.ssh_host
+        ]
+
+        # Windows specific logic for process groups
+        creationflags = 0
+        if sys.platform == "win32":
+            creationflags = subprocess.CREATE_NEW_PROCESS_GROUP
+
+        started = time.monotonic()
+        # stderr goes to a temp file: a pipe nobody reads would stall a chatty ssh,
+        # the file is only read to explain an early exit
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self.proc = subprocess.Popen(ssh_cmd, creationflags=creationflags, stderr=self._stderr)
+        except OSError as e:
+            self._close_stderr()
+            raise TunnelError(f"Failed to start SSH tunnel process: {e}") from e
+
+        # Wakes the readiness loop the moment ssh exits instead of after the deadline
+        exited = threading.Event()
+        proc = self.proc
+        threading.Thread(target=lambda: (proc.wait(), exited.set()), daemon=True).start()
+
+        deadline = started + timeout
+        delay = PROBE_BACKOFF_INITIAL
+        while not exited.is_set():
+            remaining = deadline - time.monotonic()
+            if postgres_is_ready(self.local_port, timeout=max(0.1, min(1.0, remaining))):
+                print(f"✅ SSH Tunnel established in {time.monotonic() - started:.2f}s. Port {self.local_port} is ready.")
+                return self
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.stop()
+                raise TunnelError(
+                    f"SSH Tunnel to '{self.ssh_host}' did not reach PostgreSQL within {timeout}s "
+                    f"(port {self.local_port})."
+                )
+            exited.wait(min(delay, remaining))
+            delay = min(delay * 2, PROBE_BACKOFF_MAX)
+
+        error_output = self._stderr_output()
+        self.stop()
+        error_cls = TunnelError
+        if "cannot listen" in error_output.lower() or "address already in use" in error_output.lower():
+            error_cls = PortInUseError
+        raise error_cls(
+            f"SSH Tunnel to '{self.ssh_host}' exited early (port {self.local_port}). {error_output}".strip()
+        )
+
+    def is_healthy(self):
+        return self.proc is not None and self.proc.poll() is None and postgres_is_ready(self.local_port)
+
+    def stop(self):
+        if not self.proc:
+            self._close_stderr()
+            return
+        try:
+            self.proc.terminate()
+            self.proc.wait(timeout=5)
+        except Exception as e:
+            print(f"⚠️ Error stopping tunnel: {e}")
+            try:
+                self.proc.kill()
+            except Exception:
+                pass
+        self.proc = None
+        self._close_stderr()
+        print(f"🔌 SSH Tunnel to '{self.ssh_host}' terminated.")
+
+    def _stderr_output(self):
+        if self.proc and self.proc.poll() is not None and self._stderr:
+            try:
+                self._stderr.seek(0)
+                return self._stderr.read().decode(errors="replace").strip()
+            except Exception:
+                return ""
+        return ""
+
+    def _close_stderr(self):
+        if self._stderr:
+            self._stderr.close()
+            self._stderr = None
+
+
+# ==========================================
+# TUNNEL MANAGER
+# ==========================================
+class TunnelManager:
+    """Hands out one reference-counted tunnel per environment.
+
+    The first acquire() for an environment starts the forward, the
+    last release() tears it down. A forward published by the parent process
+    through DB_TUNNEL_PORT_<ENV> is reused as-is and never terminated here.
+
+    Each environment has its own lock, so a slow tunnel start only holds up
+    acquires for that environment; the manager lock just guards the tables.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._env_locks = {}
+        self._tunnels = {}
+        self._refs = {}
+        self._external = {}
+
+    def _env_lock(self, env_name):
+        with self._lock:
+            return self._env_locks.setdefault(env_name, threading.Lock())
+
+    def acquire(self, env_name=None):
+        """Returns a local port forwarding to the environment's database."""
+        env_name = (env_name or TEST_ENV_NAME).upper()
+        with self._env_lock(env_name):
+            port = self._existing_port(env_name)
+            if port is None:
+                port = self._open(env_name)
+            with self._lock:
+                self._refs[env_name] = self._refs.get(env_name, 0) + 1
+            return port
+
+    def release(self, env_name=None):
+        env_name = (env_name or TEST_ENV_NAME).upper()
+        with self._env_lock(env_name):
+            with self._lock:
+                refs = self._refs.get(env_name, 0) - 1
+                if refs > 0:
+                    self._refs[env_name] = refs
+                    return
+                self._refs.pop(env_name, None)
+                self._external.pop(env_name, None)
+                tunnel = self._tunnels.pop(env_name, None)
+            # Stopped before the env lock is released, so a new acquire can reuse a pinned port
+            if tunnel:
+                tunnel.stop()
+
+    @contextmanager
+    def tunnel(self, env_name=None):
+        port = self.acquire(env_name)
+        try:
+            yield port
+        finally:
+            self.release(env_name)
+
+    def shutdown(self):
+        with self._lock:
+            tunnels = list(self._tunnels.values())
+            self._tunnels.clear()
+            self._refs.clear()
+            self._external.clear()
+        for tunnel in tunnels:
+            tunnel.stop()
+
+    def _existing_port(self, env_name):
+        """Returns a healthy forward already known for env_name, or None (env lock held)."""
+        with self._lock:
+            tunnel = self._tunnels.get(env_name)
+            port = self._external.get(env_name)
+        if tunnel:
+            if tunnel.is_healthy():
+                return tunnel.local_port
+            print(f"⚠️ SSH Tunnel for {env_name} is unhealthy. Restarting it...")
+            with self._lock:
+                del self._tunnels[env_name]
+            tunnel.stop()
+            try:
+                tunnel.start()
+            except Exception:
+                # The tunnel is gone, so its holders' references are void; the
+                # next acquire starts from a clean slate
+                with self._lock:
+                    self._refs.pop(env_name, None)
+                raise
+            with self._lock:
+                self._tunnels[env_name] = tunnel
+            return tunnel.local_port
+
+        if port and postgres_is_ready(port):
+            return port
+
+        # Only a forward published for this environment: a DEV port must not serve QA
+        shared_port = os.getenv(shared_port_var(env_name))
+        if shared_port and postgres_is_ready(int(shared_port)):
+            print(f"🔗 Reusing shared SSH Tunnel on port {shared_port} [{env_name}].")
+            with self._lock:
+                self._external[env_name] = int(shared_port)
+            return int(shared_port)
+        return None
+
+    def _open(self, env_name):
+        config = ENV_MAP.get(env_name, ENV_MAP["DEV"])
+        if LOCAL_DB_PORT and postgres_is_ready(LOCAL_DB_PORT):
+            # Someone else's forward on the pinned port: we cannot tell which
+            # database it reaches, so neither adopt it nor kill it
+            raise PortInUseError(
+                f"Port {LOCAL_DB_PORT} is already forwarded by another process; refusing to use it for "
+                f"{env_name}. Publish it as {shared_port_var(env_name)} or unset LOCAL_DB_PORT."
+            )
+
+        attempts = 1 if LOCAL_DB_PORT else PORT_BIND_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            tunnel = SSHTunnel(
+                env_name,
+                config.get("SSH_HOST", "simw01"),
+                LOCAL_DB_PORT or allocate_local_port(),
+                int(config.get("REMOTE_DB_PORT", 5432))
+            )
+            try:
+                tunnel.start()
+            except PortInUseError:
+                if attempt == attempts:
+                    raise
+                print(f"⚠️ Port {tunnel.local_port} was taken before ssh bound it. Retrying...")
+                continue
+            with self._lock:
+                self._tunnels[env_name] = tunnel
+            return tunnel.local_port
+
+
+# Process-wide manager used by the runner and the DB scripts
+manager = TunnelManager()
+acquire = manager.acquire
+release = manager.release
+tunnel = manager.tunnel
+shutdown = manager.shutdown
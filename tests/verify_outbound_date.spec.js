@@ -1,4 +1,5 @@
 import { test, expect } from '@playwright/test';
+import { buildAuthUrl, loginIfNeeded } from '../utils/auth';
 import path from 'path';
 import dotenv from 'dotenv';
 
@@ -22,11 +23,8 @@ test('Verify Outbound Staged Date is current date', async ({ page }) => {
 
   // Dynamic Auth URL Construction
   const redirectUri = BASE_URL; 
-  const state = '3c9abb48-9b50-4679-88a2-5d8b4d30ec82'; 
-  const nonce = 'f40a8b05-859a-440d-ae2e-4f4fa90d3e5e'; 
-
   // Construct the full URL
-  const authUrl = `${AUTH_BASE}/realms/${AUTH_REALM}/protocol/openid-connect/auth?client_id=${AUTH_CLIENT}&redirect_uri=${encodeURIComponent(redirectUri)}&state=${state}&response_mode=fragment&response_type=code&scope=openid&nonce=${nonce}`;
+  const authUrl = buildAuthUrl({ authBaseUrl: AUTH_BASE, authRealm: AUTH_REALM, authClientId: AUTH_CLIENT, redirectUri });
   
   console.log(`🚀 Navigating to Login...`);
   
@@ -36,9 +34,7 @@ test('Verify Outbound Staged Date is current date', async ({ page }) => {
   await page.waitForLoadState('networkidle');
 
   // Fill credentials
-  await page.getByRole('textbox', { name: 'Username or email' }).fill('moloy', { timeout: 60000 });
-  await page.getByRole('textbox', { name: 'Password' }).fill('qwerty');
-  await page.getByRole('button', { name: 'Sign In' }).click();
+  await loginIfNeeded(page);
   await page.getByText('Data Explorer').click();  
   // Wait for navigation after login
   await page.waitForLoadState('networkidle');
@@ -63,9 +59,6 @@ test('Verify Outbound Staged Date is current date', async ({ page }) => {
   await row.waitFor({ state: 'visible', timeout: 30000 });
   await row.click(); // Click to expand details
   
-  // Wait a moment for accordion animation
-  await page.waitForTimeout(1000);
-
   // 🎯 FIX: Locator Strategy - Target input via label text
   // Finds the label 'Outbound Staged Date' and gets the associated input
   const dateInput = page.locator('sp-date-picker').filter({ hasText: 'Outbound Staged Date' }).locator('input');
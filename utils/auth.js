@@ -0,0 +1,93 @@
+// utils/auth.js
+//
+// Login-once support. The runner signs in once per environment and saves the
+// Playwright storage state to .auth/<env>.json; specs and scripts start from
+// that state and only type credentials when Keycloak actually shows the form.
+//
+// CommonJS so plain `node` scripts can require it as well as specs.
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+
+const AUTH_DIR = path.resolve(__dirname, '../.auth');
+// Keycloak's default SSO idle timeout is 30 minutes
+const STORAGE_STATE_TTL_MINUTES = parseInt(process.env.STORAGE_STATE_TTL_MINUTES || '30', 10);
+const AUTH_USERNAME = process.env.AUTH_USERNAME || 'moloy';
+const AUTH_PASSWORD = process.env.AUTH_PASSWORD || 'qwerty';
+
+function isStorageStateFresh(file, ttlMinutes = STORAGE_STATE_TTL_MINUTES) {
+    try {
+        const ageMs = Date.now() - fs.statSync(file).mtimeMs;
+        return ageMs < ttlMinutes * 60 * 1000;
+    } catch {
+        return false;
+    }
+}
+
+// Storage state handed down by the runner (STORAGE_STATE), if it has not expired
+function activeStorageState() {
+    const file = process.env.STORAGE_STATE;
+    return file && isStorageStateFresh(file) ? file : undefined;
+}
+
+function buildAuthUrl({ authBaseUrl, authRealm, authClientId, redirectUri }) {
+    // Fresh state/nonce per login so concurrent runs don't share an auth request
+    return `${authBaseUrl}/realms/${authRealm}/protocol/openid-connect/auth` +
+        `?client_id=${authClientId}&redirect_uri=${encodeURIComponent(redirectUri)}` +
+        `&state=${crypto.randomUUID()}&response_mode=fragment&response_type=code&scope=openid&nonce=${crypto.randomUUID()}`;
+}
+
+/**
+ * Submits the Keycloak login form if it is shown. With a valid storage state
+ * Keycloak redirects straight back to the app, so filling unconditionally would
+ * time out. Returns true when credentials were submitted.
+ */
+async function loginIfNeeded(page, { username = AUTH_USERNAME, password = AUTH_PASSWORD, timeout = 60000 } = {}) {
+    const usernameBox = page.getByRole('textbox', { name: 'Username or email' });
+    await Promise.race([
+        usernameBox.waitFor({ state: 'visible', timeout }),
+        page.waitForLoadState('networkidle', { timeout })
+    ]).catch(() => {});
+
+    if (!(await usernameBox.isVisible())) {
+        console.log('🔓 Reusing saved login session.');
+        return false;
+    }
+    await usernameBox.fill(username, { timeout });
+    await page.getByRole('textbox', { name: 'Password' }).fill(password, { timeout });
+    await page.getByRole('button', { name: 'Sign In' }).click();
+    return true;
+}
+
+/**
+ * Logs in through the form and writes the context's storage state to `file`.
+ */
+async function saveStorageState(browser, { file, uiUrl, authBaseUrl, authRealm, authClientId }) {
+    const context = await browser.newContext();
+    try {
+        const page = await context.newPage();
+        await page.goto(buildAuthUrl({ authBaseUrl, authRealm, authClientId, redirectUri: uiUrl }));
+        await loginIfNeeded(page);
+        await page.waitForURL(url => url.href.startsWith(uiUrl), { timeout: 60000 });
+        await page.waitForLoadState('networkidle');
+
+        fs.mkdirSync(path.dirname(file), { recursive: true });
+        // Write then rename so parallel readers never see a half-written file
+        const tmpFile = `${file}.${process.pid}.tmp`;
+        await context.storageState({ path: tmpFile });
+        fs.renameSync(tmpFile, file);
+        return file;
+    } finally {
+        await context.close();
+    }
+}
+
+module.exports = {
+    AUTH_DIR,
+    STORAGE_STATE_TTL_MINUTES,
+    isStorageStateFresh,
+    activeStorageState,
+    buildAuthUrl,
+    loginIfNeeded,
+    saveStorageState
+};
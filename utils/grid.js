@@ -0,0 +1,112 @@
+// utils/grid.js
+//
+// Reads ngx-datatable grids in a single page.evaluate() instead of one CDP round
+// trip per header and per cell. Header -> column index maps are cached per page
+// and grid until the page navigates, so repeated reads only fetch the rows.
+//
+// CommonJS so plain `node` scripts can require it as well as specs.
+
+const DEFAULT_TIMEOUT = 30000;
+const HEADER_CELL = 'datatable-header-cell';
+const BODY_ROW = 'datatable-body-row';
+const BODY_CELL = 'datatable-body-cell';
+
+// page -> Map(gridSelector -> { count, index: { header: columnIndex } })
+const headerCache = new WeakMap();
+
+function cacheFor(page) {
+    let grids = headerCache.get(page);
+    if (!grids) {
+        grids = new Map();
+        headerCache.set(page, grids);
+        // Any main-frame navigation (including SPA route changes) can swap the grid
+        page.on('framenavigated', frame => {
+            if (frame === page.mainFrame()) grids.clear();
+        });
+    }
+    return grids;
+}
+
+/** Drops cached header maps for a page (e.g. after switching entity without navigating). */
+function clearGridCache(page) {
+    const grids = headerCache.get(page);
+    if (grids) grids.clear();
+}
+
+/**
+ * Reads up to `limit` rows of a grid and returns them as objects keyed by header text.
+ *
+ * @param {import('@playwright/test').Page} page
+ * @param {object} [opts]
+ * @param {string[]} [opts.columns]  only these headers (throws if one is missing); default all
+ * @param {number} [opts.limit=1]    max rows to read, 0 for every rendered row
+ * @param {string} [opts.hasText]    only rows whose text contains this
+ * @param {string} [opts.grid]       selector scoping the grid when a page has several
+ * @param {number} [opts.timeout]    how long to wait for the first row
+ */
+async function readGridRows(page, { columns, limit = 1, hasText, grid, timeout = DEFAULT_TIMEOUT } = {}) {
+    const scope = grid ? `${grid} ` : '';
+    await page.locator(`${scope}${BODY_ROW}`).first().waitFor({ state: 'visible', timeout });
+
+    const grids = cacheFor(page);
+    const cacheKey = grid || '';
+    const cached = grids.get(cacheKey) || null;
+
+    const result = await page.evaluate(({ grid, cached, limit, hasText, sel }) => {
+        const root = grid ? document.querySelector(grid) : document;
+        if (!root) return { error: `Grid not found: ${grid}` };
+        const text = el => ((el.innerText ?? el.textContent) || '').trim();
+
+        const headerCells = root.querySelectorAll(sel.header);
+        let headers = null;
+        // Re-read headers when nothing is cached or the column count changed
+        if (!cached || headerCells.length !== cached.count) {
+            headers = { count: headerCells.length, index: {} };
+            headerCells.forEach((cell, i) => {
+                const name = text(cell);
+                if (name && !(name in headers.index)) headers.index[name] = i;
+            });
+        }
+
+        const rows = [];
+        for (const row of root.querySelectorAll(sel.row)) {
+            if (hasText && !text(row).includes(hasText)) continue;
+            rows.push(Array.from(row.querySelectorAll(sel.cell), cell => text(cell) || null));
+            if (limit && rows.length >= limit) break;
+        }
+        return { headers, rows };
+    }, { grid, cached, limit, hasText, sel: { header: HEADER_CELL, row: BODY_ROW, cell: BODY_CELL } });
+
+    if (result.error) throw new Error(`❌ ${result.error}`);
+    if (result.headers) grids.set(cacheKey, result.headers);
+    const { index } = result.headers || cached;
+
+    const wanted = columns || Object.keys(index);
+    const missing = wanted.find(name => !(name in index));
+    if (missing) {
+        // A cached map can be stale when the grid swapped columns in place; re-read once
+        if (!result.headers) {
+            grids.delete(cacheKey);
+            return readGridRows(page, { columns, limit, hasText, grid, timeout });
+        }
+        throw new Error(`❌ Column not found: ${missing}`);
+    }
+
+    return result.rows.map(cells => {
+        const row = {};
+        for (const name of wanted) row[name] = cells[index[name]] ?? null;
+        return row;
+    });
+}
+
+/** First matching grid row as an object, or null when the grid has no match. */
+async function readGridRow(page, opts = {}) {
+    const rows = await readGridRows(page, { ...opts, limit: 1 });
+    return rows[0] || null;
+}
+
+module.exports = {
+    readGridRows,
+    readGridRow,
+    clearGridCache
+};
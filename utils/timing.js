@@ -0,0 +1,23 @@
+// utils/timing.js
+//
+// Phase markers for the test runner. A phase prints one line,
+//   ⏱️ PHASE [login] 1234ms
+// which china-cdbu-test.py collects per spec/script and stores with the run history.
+//
+// CommonJS so plain `node` scripts can require it as well as specs.
+
+function reportPhase(name, ms) {
+    console.log(`⏱️ PHASE [${name}] ${Math.round(ms)}ms`);
+}
+
+/** Runs `fn` and reports how long it took as phase `name` (also when it throws). */
+async function phase(name, fn) {
+    const started = Date.now();
+    try {
+        return await fn();
+    } finally {
+        reportPhase(name, Date.now() - started);
+    }
+}
+
+module.exports = { phase, reportPhase };
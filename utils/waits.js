@@ -0,0 +1,119 @@
+// utils/waits.js
+//
+// Condition-based waits to use instead of page.waitForTimeout(). Each helper
+// returns as soon as its condition holds, so a fast environment is not held
+// back by a sleep sized for the slowest one.
+//
+// CommonJS so plain `node` scripts can require it as well as specs.
+
+const DEFAULT_TIMEOUT = 30000;
+const GRID_ROW = 'datatable-body-row';
+// ngx-datatable shows a progress bar while loading and an empty-row when there is no data
+const GRID_LOADING = 'datatable-progress, .progress-linear';
+const GRID_EMPTY = '.empty-row';
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+/**
+ * Runs `action` (e.g. () => saveBtn.click()) and resolves once no request has
+ * been in flight for `quietMs`. The listeners are attached before the action
+ * runs, so the requests it fires are always counted; calling this after the
+ * click would miss a save that is already in flight.
+ * Unlike waitForLoadState('networkidle') this also works after the page has loaded
+ * (e.g. after clicking Apply/Save on an already-open page).
+ */
+async function waitForNetworkQuiet(page, action, { quietMs = 500, timeout = DEFAULT_TIMEOUT } = {}) {
+    let inflight = 0;
+    let lastActivity = Date.now();
+    const onStart = () => { inflight++; lastActivity = Date.now(); };
+    const onEnd = () => { inflight = Math.max(0, inflight - 1); lastActivity = Date.now(); };
+    page.on('request', onStart);
+    page.on('requestfinished', onEnd);
+    page.on('requestfailed', onEnd);
+    try {
+        if (action) await action();
+        lastActivity = Date.now();
+        const deadline = Date.now() + timeout;
+        while (inflight > 0 || Date.now() - lastActivity < quietMs) {
+            if (Date.now() > deadline) {
+                throw new Error(`Network not quiet for ${quietMs}ms within ${timeout}ms (${inflight} request(s) in flight)`);
+            }
+            await sleep(50);
+        }
+    } finally {
+        page.off('request', onStart);
+        page.off('requestfinished', onEnd);
+        page.off('requestfailed', onEnd);
+    }
+}
+
+/**
+ * Resolves when a datatable grid has finished loading: no progress bar and
+ * either at least one row or the empty-row placeholder.
+ */
+async function waitForGridLoaded(page, { rowSelector = GRID_ROW, timeout = DEFAULT_TIMEOUT } = {}) {
+    await page.waitForFunction(({ rowSelector, loading, empty }) => {
+        if (document.querySelector(loading)) return false;
+        return document.querySelector(rowSelector) !== null || document.querySelector(empty) !== null;
+    }, { rowSelector, loading: GRID_LOADING, empty: GRID_EMPTY }, { timeout });
+}
+
+/**
+ * Resolves with the row count once it has not changed for `stableMs`
+ * (grids and option lists often render in several batches).
+ */
+async function waitForRowCountStable(page, { rowSelector = GRID_ROW, stableMs = 500, interval = 100, timeout = DEFAULT_TIMEOUT } = {}) {
+    const deadline = Date.now() + timeout;
+    let count = await page.locator(rowSelector).count();
+    let stableSince = Date.now();
+    while (Date.now() - stableSince < stableMs) {
+        if (Date.now() > deadline) {
+            throw new Error(`Row count for "${rowSelector}" did not settle within ${timeout}ms (last: ${count})`);
+        }
+        await sleep(interval);
+        const next = await page.locator(rowSelector).count();
+        if (next !== count) {
+            count = next;
+            stableSince = Date.now();
+        }
+    }
+    return count;
+}
+
+/**
+ * Polls `read()` (a DB query, a grid read, ...) until `until(value)` is true.
+ * Returns the last value read; with `throwOnTimeout: false` it returns the last
+ * value instead of throwing, for checks that expect nothing to change.
+ */
+async function waitForValueChange(read, { until, interval = 1000, timeout = DEFAULT_TIMEOUT, throwOnTimeout = true } = {}) {
+    const deadline = Date.now() + timeout;
+    let value = await read();
+    while (!until(value)) {
+        if (Date.now() + interval > deadline) {
+            if (throwOnTimeout) {
+                throw new Error(`Value did not reach the expected state within ${timeout}ms (last: ${JSON.stringify(value)})`);
+            }
+            return value;
+        }
+        await sleep(interval);
+        value = await read();
+    }
+    return value;
+}
+
+/**
+ * A deliberate fixed sleep (e.g. waiting out a scheduler interval). Prints a
+ * marker the runner totals per spec so fixed waiting time stays visible.
+ */
+async function fixedSleep(page, ms, reason = '') {
+    console.log(`⏸️ FIXED-SLEEP ${ms}ms${reason ? ` (${reason})` : ''}`);
+    await page.waitForTimeout(ms);
+}
+
+module.exports = {
+    waitForNetworkQuiet,
+    waitForGridLoaded,
+    waitForRowCountStable,
+    waitForValueChange,
+    fixedSleep
+};